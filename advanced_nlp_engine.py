@@ -5,30 +5,144 @@ Created by: Sajjad Baloch
 """
 
 import re
+import sys
+import importlib.util
 from collections import Counter
+from collections.abc import Mapping
 from datetime import datetime
 
-try:
+import entity_scanner
+from intent_matcher import IntentMatcher
+
+# nltk itself is imported on first use, so importing this module stays cheap
+NLP_AVAILABLE = importlib.util.find_spec("nltk") is not None
+
+# Analyzer -> NLTK data paths it needs (any one of them). These are only
+# looked up locally; downloading is a one-off setup step, never done at runtime.
+NLTK_RESOURCES = {
+    "sentiment": ["sentiment/vader_lexicon.zip", "sentiment/vader_lexicon"],
+    "tokenizer": ["tokenizers/punkt_tab", "tokenizers/punkt"],
+    "stopwords": ["corpora/stopwords", "corpora/stopwords.zip"],
+    "lemmatizer": ["corpora/wordnet", "corpora/wordnet.zip"],
+}
+NLTK_DOWNLOADS = ["vader_lexicon", "punkt", "punkt_tab", "stopwords", "wordnet", "omw-1.4"]
+
+
+def resource_available(paths):
+    """True if any of the NLTK data paths exists locally (no download attempt)."""
+    import nltk
+
+    for path in paths:
+        try:
+            nltk.data.find(path)
+            return True
+        except LookupError:
+            continue
+    return False
+
+
+def download_resources():
+    """Fetches the NLTK data once at setup time: python advanced_nlp_engine.py --download"""
     import nltk
+
+    for item in NLTK_DOWNLOADS:
+        nltk.download(item, quiet=True)
+
+
+def _build_sentiment():
     from nltk.sentiment import SentimentIntensityAnalyzer
-    from nltk.tokenize import word_tokenize, sent_tokenize
+    return SentimentIntensityAnalyzer()
+
+
+def _build_tokenizer():
+    from nltk import tokenize
+    return tokenize
+
+
+def _build_stopwords():
     from nltk.corpus import stopwords
+    return set(stopwords.words('english'))
+
+
+def _build_lemmatizer():
     from nltk.stem import WordNetLemmatizer
-    
-    # Download required NLTK data
-    required_downloads = [
-        'vader_lexicon', 'punkt', 'stopwords', 
-        'wordnet', 'averaged_perceptron_tagger', 'omw-1.4'
-    ]
-    for item in required_downloads:
-        try:
-            nltk.download(item, quiet=True)
-        except:
-            pass
-    
-    NLP_AVAILABLE = True
-except ImportError:
-    NLP_AVAILABLE = False
+    return WordNetLemmatizer()
+
+
+ANALYZER_FACTORIES = {
+    "sentiment": _build_sentiment,
+    "tokenizer": _build_tokenizer,
+    "stopwords": _build_stopwords,
+    "lemmatizer": _build_lemmatizer,
+}
+
+
+ANALYSIS_STAGES = ("sentiment", "intent", "keywords", "entities", "question_type", "complexity")
+
+
+class TextAnalysis(Mapping):
+    """
+    Lazy result of get_comprehensive_analysis. Each field is computed on first
+    access and cached; word and sentence tokenization run at most once and are
+    shared by keywords and complexity. Use dict(analysis) for a plain dict.
+    """
+
+    def __init__(self, engine, text, stages=None):
+        self.engine = engine
+        self.text = text
+        self.stages = tuple(ANALYSIS_STAGES if stages is None else stages)
+        unknown = set(self.stages) - set(ANALYSIS_STAGES)
+        if unknown:
+            raise ValueError(f"Unknown analysis stages: {sorted(unknown)}")
+        self._values = {"timestamp": datetime.now().isoformat()}
+        self._tokens = {}
+
+    def _tokenize(self, kind):
+        """Shared "words" / "sentences" tokenization, or None when NLTK is unavailable."""
+        if kind not in self._tokens:
+            tokenizer = self.engine.tokenizer
+            try:
+                if tokenizer is None:
+                    value = None
+                elif kind == "words":
+                    value = tokenizer.word_tokenize(self.text)
+                else:
+                    value = tokenizer.sent_tokenize(self.text)
+            except Exception:
+                value = None
+            self._tokens[kind] = value
+        return self._tokens[kind]
+
+    def _compute(self, stage):
+        engine = self.engine
+        if stage == "sentiment":
+            label, score, details = engine.analyze_sentiment(self.text)
+            return {"label": label, "score": score, "details": details}
+        if stage == "intent":
+            label, confidence = engine.detect_intent(self.text)
+            return {"label": label, "confidence": confidence}
+        if stage == "keywords":
+            return engine.extract_keywords(self.text, tokens=self._tokenize("words"))
+        if stage == "entities":
+            return engine.extract_entities(self.text)
+        if stage == "question_type":
+            return engine.detect_question_type(self.text)
+        return engine.analyze_complexity(
+            self.text, words=self._tokenize("words"), sentences=self._tokenize("sentences")
+        )
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            if key not in self.stages:
+                raise KeyError(key)
+            self._values[key] = self._compute(key)
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self.stages + ("timestamp",))
+
+    def __len__(self):
+        return len(self.stages) + 1
 
 
 class AdvancedNLPEngine:
@@ -44,11 +158,8 @@ class AdvancedNLPEngine:
     
     def __init__(self):
         self.nlp_available = NLP_AVAILABLE
-        
-        if self.nlp_available:
-            self.sia = SentimentIntensityAnalyzer()
-            self.stop_words = set(stopwords.words('english'))
-            self.lemmatizer = WordNetLemmatizer()
+        # NLTK analyzers, built on first use (None when nltk or its data is missing)
+        self._analyzers = {}
         
         # Define intent patterns
         self.intent_patterns = {
@@ -113,13 +224,47 @@ class AdvancedNLPEngine:
             "which": r"^which\b",
             "yes_no": r"^(is|are|do|does|can|could|will|would|should)\b"
         }
-        
+        self.compile_intents()
+
+    def compile_intents(self):
+        """Rebuilds the intent automaton; call after editing intent_patterns."""
+        self.intent_matcher = IntentMatcher(self.intent_patterns)
+        
+    def _load(self, name):
+        """Builds an NLTK analyzer the first time it is needed. Returns: analyzer or None"""
+        if name not in self._analyzers:
+            analyzer = None
+            if self.nlp_available:
+                if resource_available(NLTK_RESOURCES[name]):
+                    analyzer = ANALYZER_FACTORIES[name]()
+                else:
+                    print(f"NLTK data for '{name}' not found, using fallback "
+                          f"(run: python advanced_nlp_engine.py --download)")
+            self._analyzers[name] = analyzer
+        return self._analyzers[name]
+
+    @property
+    def sia(self):
+        return self._load("sentiment")
+
+    @property
+    def tokenizer(self):
+        return self._load("tokenizer")
+
+    @property
+    def stop_words(self):
+        return self._load("stopwords")
+
+    @property
+    def lemmatizer(self):
+        return self._load("lemmatizer")
+
     def analyze_sentiment(self, text):
         """
         Perform sentiment analysis
         Returns: (sentiment_label, confidence_score, detailed_scores)
         """
-        if not self.nlp_available:
+        if self.sia is None:
             return "neutral", 0.0, {}
         
         try:
@@ -143,43 +288,42 @@ class AdvancedNLPEngine:
         Detect user intent with confidence score
         Returns: (intent, confidence)
         """
-        text_lower = text.lower()
-        intent_scores = {}
+        # Keywords score 2 and patterns 3, all intents scored in one scan
+        best_intent, max_score = self.intent_matcher.best(text.lower())
         
-        for intent, data in self.intent_patterns.items():
-            score = 0
-            
-            # Check keywords
-            keyword_matches = sum(1 for keyword in data["keywords"] if keyword in text_lower)
-            score += keyword_matches * 2
-            
-            # Check patterns
-            pattern_matches = sum(1 for pattern in data["patterns"] if re.search(pattern, text_lower))
-            score += pattern_matches * 3
-            
-            if score > 0:
-                intent_scores[intent] = score
-        
-        if intent_scores:
-            best_intent = max(intent_scores, key=intent_scores.get)
-            max_score = intent_scores[best_intent]
+        if best_intent is not None:
             confidence = min(max_score / 10.0, 1.0)  # Normalize to 0-1
             return best_intent, confidence
         
         return "general", 0.5
     
-    def extract_keywords(self, text, top_n=5):
+    def detect_intent_batch(self, texts):
+        """
+        Detect intents for many texts (e.g. chat logs), reusing results for repeated texts
+        Returns: list of (intent, confidence)
+        """
+        results = {}
+        return [
+            results[text] if text in results else results.setdefault(text, self.detect_intent(text))
+            for text in texts
+        ]
+    
+    def extract_keywords(self, text, top_n=5, tokens=None):
         """
         Extract important keywords using TF-IDF-like approach
+        tokens: optional word tokens of text, to reuse an existing tokenization
         Returns: list of (keyword, importance_score)
         """
-        if not self.nlp_available:
+        if self.tokenizer is None or self.stop_words is None or self.lemmatizer is None:
             words = text.lower().split()
             return [(w, 1.0) for w in words[:top_n] if len(w) > 3]
         
         try:
             # Tokenize and clean
-            tokens = word_tokenize(text.lower())
+            if tokens is None:
+                tokens = self.tokenizer.word_tokenize(text.lower())
+            else:
+                tokens = [token.lower() for token in tokens]
             
             # Remove stopwords and non-alphabetic tokens
             filtered_tokens = [
@@ -206,48 +350,24 @@ class AdvancedNLPEngine:
     
     def extract_entities(self, text):
         """
-        Extract named entities using pattern matching
+        Extract named entities using pattern matching (one scan, see entity_scanner)
         Returns: dict of entity types and their values
         """
-        entities = {
-            "dates": [],
-            "times": [],
-            "emails": [],
-            "phones": [],
-            "urls": [],
-            "money": [],
-            "percentages": []
-        }
-        
-        # Date patterns
-        date_patterns = [
-            r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}',
-            r'\d{4}[/-]\d{1,2}[/-]\d{1,2}',
-            r'\b(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},?\s+\d{4}\b'
-        ]
-        for pattern in date_patterns:
-            entities["dates"].extend(re.findall(pattern, text, re.IGNORECASE))
-        
-        # Time patterns
-        entities["times"] = re.findall(r'\b\d{1,2}:\d{2}\s*(am|pm|AM|PM)?\b', text)
-        
-        # Email
-        entities["emails"] = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
-        
-        # Phone
-        entities["phones"] = re.findall(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', text)
-        
-        # URLs
-        entities["urls"] = re.findall(r'https?://[^\s]+', text)
-        
-        # Money
-        entities["money"] = re.findall(r'\$?\d+(?:,\d{3})*(?:\.\d{2})?', text)
-        
-        # Percentages
-        entities["percentages"] = re.findall(r'\d+(?:\.\d+)?%', text)
-        
-        # Remove empty lists
-        return {k: v for k, v in entities.items() if v}
+        return entity_scanner.extract(text)
+    
+    def extract_entity_spans(self, text):
+        """
+        Extract named entities with their positions
+        Returns: list of EntitySpan(type, text, start, end)
+        """
+        return entity_scanner.scan(text)
+    
+    def extract_entities_batch(self, texts, processes=None):
+        """
+        Extract entities from many texts (e.g. chat logs); processes > 1 uses a process pool
+        Returns: list of entity dicts
+        """
+        return entity_scanner.extract_batch(texts, processes=processes)
     
     def detect_question_type(self, text):
         """
@@ -262,12 +382,13 @@ class AdvancedNLPEngine:
         
         return None
     
-    def analyze_complexity(self, text):
+    def analyze_complexity(self, text, words=None, sentences=None):
         """
         Analyze text complexity
+        words / sentences: optional existing tokenization of text
         Returns: dict with complexity metrics
         """
-        if not self.nlp_available:
+        if self.tokenizer is None:
             return {
                 "word_count": len(text.split()),
                 "char_count": len(text),
@@ -275,8 +396,10 @@ class AdvancedNLPEngine:
             }
         
         try:
-            sentences = sent_tokenize(text)
-            words = word_tokenize(text)
+            if sentences is None:
+                sentences = self.tokenizer.sent_tokenize(text)
+            if words is None:
+                words = self.tokenizer.word_tokenize(text)
             
             avg_word_length = sum(len(word) for word in words) / len(words) if words else 0
             avg_sentence_length = len(words) / len(sentences) if sentences else 0
@@ -304,34 +427,14 @@ class AdvancedNLPEngine:
                 "complexity": "medium"
             }
     
-    def get_comprehensive_analysis(self, text):
+    def get_comprehensive_analysis(self, text, stages=None):
         """
-        Perform comprehensive NLP analysis
-        Returns: dict with all analysis results
+        Perform comprehensive NLP analysis, lazily
+        stages: subset of ANALYSIS_STAGES to expose (default: all); e.g. ("intent",)
+                never loads VADER or the lemmatizer
+        Returns: TextAnalysis mapping; each field is computed on first access
         """
-        sentiment, sent_score, sent_details = self.analyze_sentiment(text)
-        intent, intent_conf = self.detect_intent(text)
-        keywords = self.extract_keywords(text)
-        entities = self.extract_entities(text)
-        question_type = self.detect_question_type(text)
-        complexity = self.analyze_complexity(text)
-        
-        return {
-            "sentiment": {
-                "label": sentiment,
-                "score": sent_score,
-                "details": sent_details
-            },
-            "intent": {
-                "label": intent,
-                "confidence": intent_conf
-            },
-            "keywords": keywords,
-            "entities": entities,
-            "question_type": question_type,
-            "complexity": complexity,
-            "timestamp": datetime.now().isoformat()
-        }
+        return TextAnalysis(self, text, stages)
     
     def generate_response_suggestions(self, analysis):
         """
@@ -340,8 +443,9 @@ class AdvancedNLPEngine:
         """
         suggestions = []
         
-        intent = analysis["intent"]["label"]
-        sentiment = analysis["sentiment"]["label"]
+        # Stages left out of a TextAnalysis are simply skipped
+        intent = (analysis.get("intent") or {}).get("label")
+        sentiment = (analysis.get("sentiment") or {}).get("label")
         
         # Intent-based suggestions
         if intent == "greeting":
@@ -360,7 +464,7 @@ class AdvancedNLPEngine:
             suggestions.append("Match the positive energy")
         
         # Question type suggestions
-        if analysis["question_type"]:
+        if analysis.get("question_type"):
             q_type = analysis["question_type"]
             if q_type == "yes_no":
                 suggestions.append("Provide clear yes/no answer first")
@@ -372,6 +476,9 @@ class AdvancedNLPEngine:
 
 # Test the engine
 if __name__ == "__main__":
+    if "--download" in sys.argv:
+        download_resources()
+
     engine = AdvancedNLPEngine()
     
     test_queries = [
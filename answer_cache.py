@@ -0,0 +1,190 @@
+"""
+Semantic Answer Cache
+Reuses LLM answers for questions whose embeddings are near-identical to a
+previously answered one. Entries are scoped to a knowledge-base version so a
+re-sync invalidates them.
+
+With persist_path set, the cache is written in the background at most once
+per save_interval seconds after a store, and once more at exit, never in
+the request path. The file is a warm-start snapshot of one process: with
+several gunicorn workers, each loads it at startup and the last one to save
+wins.
+"""
+
+import os
+import atexit
+import time
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        similarity_threshold=0.92,
+        max_entries=512,
+        max_bytes=8 * 1024 * 1024,
+        ttl_seconds=6 * 3600,
+        persist_path=None,
+        save_interval=30.0,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        self.save_interval = save_interval
+        self.kb_version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> dict(vector, answer, question, stored_at)
+        self._next_key = 0
+        self._bytes = 0
+        self._matrix = None
+        self._matrix_keys = []
+        self._lock = threading.Lock()
+        # Serializes writers of persist_path, so the newest snapshot lands last
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._save_timer = None
+
+        if self.persist_path:
+            if os.path.exists(self.persist_path):
+                self.load()
+            atexit.register(self.flush)
+
+    @staticmethod
+    def _entry_size(entry):
+        return entry["vector"].nbytes + len(entry["answer"]) + len(entry["question"])
+
+    def _normalize(self, vector):
+        vector = np.array(vector, dtype="float32").reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _evict(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= self._entry_size(entry)
+        self._matrix = None
+
+    def _scope(self, kb_version):
+        """Drops every entry when the knowledge base has been re-synced."""
+        if kb_version != self.kb_version:
+            self._entries.clear()
+            self._bytes = 0
+            self._matrix = None
+            self.kb_version = kb_version
+
+    def lookup(self, query_vector, kb_version):
+        """Returns the cached answer of the most similar question, or None."""
+        query_vector = self._normalize(query_vector)
+        with self._lock:
+            self._scope(kb_version)
+            now = time.time()
+            for key in [k for k, e in self._entries.items() if now - e["stored_at"] >= self.ttl_seconds]:
+                self._evict(key)
+
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._matrix_keys = list(self._entries.keys())
+                self._matrix = np.stack([self._entries[k]["vector"] for k in self._matrix_keys])
+
+            similarities = self._matrix @ query_vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            key = self._matrix_keys[best]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]["answer"]
+
+    def store(self, query_vector, answer, kb_version, question=""):
+        entry = {
+            "vector": self._normalize(query_vector),
+            "answer": answer,
+            "question": question,
+            "stored_at": time.time(),
+        }
+        with self._lock:
+            self._scope(kb_version)
+            self._entries[self._next_key] = entry
+            self._next_key += 1
+            self._bytes += self._entry_size(entry)
+            self._matrix = None
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                self._evict(next(iter(self._entries)))
+
+            # Debounced: one background save covers every store in the interval
+            if self.persist_path:
+                self._dirty = True
+                if self._save_timer is None:
+                    self._save_timer = threading.Timer(self.save_interval, self.flush)
+                    self._save_timer.daemon = True
+                    self._save_timer.start()
+
+    def flush(self):
+        """Saves pending changes now; run by the save timer and at exit."""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+            dirty, self._dirty = self._dirty, False
+        if timer is not None:
+            timer.cancel()
+        if dirty:
+            self.save()
+
+    def save(self):
+        """Writes the cache to persist_path; failures are logged, since the cache is only an optimization."""
+        with self._save_lock:
+            with self._lock:
+                state = {
+                    "kb_version": self.kb_version,
+                    "entries": list(self._entries.values()),
+                }
+            directory = os.path.dirname(os.path.abspath(self.persist_path))
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(prefix=".answer_cache-", suffix=".tmp", dir=directory)
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(state, f)
+                os.replace(tmp_path, self.persist_path)
+            except Exception as e:
+                print(f"Could not save answer cache: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def load(self):
+        try:
+            with open(self.persist_path, "rb") as f:
+                state = pickle.load(f)
+        except Exception as e:
+            print(f"Could not load answer cache: {e}")
+            return
+
+        with self._lock:
+            self.kb_version = state["kb_version"]
+            for entry in state["entries"]:
+                self._entries[self._next_key] = entry
+                self._next_key += 1
+                self._bytes += self._entry_size(entry)
+            self._matrix = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -1,19 +1,55 @@
-
-from flask import Flask, render_template, request, jsonify
+import json
+import uuid
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from chatbot import ChatBot
+import metrics
 
 app = Flask(__name__)
 bot = ChatBot()
 
+SESSION_COOKIE = 'neura_sid'
+
+def current_session():
+    """Returns the visitor's conversation id, minting one for new visitors."""
+    return request.cookies.get(SESSION_COOKIE) or uuid.uuid4().hex
+
+def with_session(response, session_id):
+    if request.cookies.get(SESSION_COOKIE) != session_id:
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+    return response
+
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return with_session(app.make_response(render_template('index.html')), current_session())
 
 @app.route('/get_response', methods=['POST'])
 def get_response():
     user_input = request.form['user_input']
-    response = bot.get_response(user_input)
-    return jsonify({'response': response})
+    session_id = current_session()
+    response = bot.get_response(user_input, session_id)
+    return with_session(jsonify({'response': response}), session_id)
+
+@app.route('/stream_response', methods=['POST'])
+def stream_response():
+    user_input = request.form['user_input']
+    session_id = current_session()
+
+    def generate():
+        # Server-sent events: one "data:" frame per token delta, then [DONE]
+        for delta in bot.stream_response(user_input, session_id):
+            yield f"data: {json.dumps({'delta': delta})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return with_session(Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    ), session_id)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Prometheus text exposition format
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,183 @@
+"""
+NEURA v2.4 - Async ASGI Server
+Serves the same routes as app.py from a single event loop. Retrieval and
+embedding (CPU-bound) run in a small thread pool while the Groq round-trip is
+awaited on a pooled httpx client, so one process can hold hundreds of
+in-flight conversations.
+
+Run with: uvicorn asgi_app:app --host 0.0.0.0 --port 8000
+"""
+
+import os
+import json
+import uuid
+import asyncio
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+
+import metrics
+from chatbot import ChatBot
+from llm_client import AsyncLLMClient, LLMError
+from singleflight import AsyncSingleFlight
+
+bot = ChatBot()
+llm = AsyncLLMClient(bot.api_key)
+executor = ThreadPoolExecutor(max_workers=int(os.getenv("RETRIEVAL_THREADS", "4")))
+templates = Jinja2Templates(directory="templates")
+# Groq calls go through the async client here, so report its counters instead
+metrics.registry.register_collector("llm", lambda: metrics.llm_client_metrics(llm))
+# Identical questions in flight on the event loop share one answer; like the LLM
+# counters, these replace the ChatBot's thread-based ones (one family per metric)
+flights = AsyncSingleFlight()
+metrics.registry.register_collector(
+    "singleflight", lambda: metrics.singleflight_metrics(flights.stats(), "asyncio")
+)
+
+SESSION_COOKIE = "neura_sid"
+
+
+def current_session(request):
+    """Returns the visitor's conversation id, minting one for new visitors."""
+    return request.cookies.get(SESSION_COOKIE) or uuid.uuid4().hex
+
+
+def with_session(request, response, session_id):
+    if request.cookies.get(SESSION_COOKIE) != session_id:
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+    return response
+
+
+async def run_blocking(func, *args):
+    """Runs CPU-bound ChatBot work (encoding, FAISS, prompt assembly) off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, func, *args)
+
+
+async def index(request):
+    response = templates.TemplateResponse(request, "index.html")
+    return with_session(request, response, current_session(request))
+
+
+async def compute_answer(user_input, session_id, trace):
+    """
+    Runs the whole pipeline for one question (the single-flight leader's work).
+    Returns: (answer, True if it belongs in the conversation history)
+    """
+    answer, messages, query_vector = await run_blocking(bot.prepare, user_input, session_id, trace)
+    if answer is not None:
+        return answer, trace.outcome != "fast_path"
+    try:
+        with trace.stage("llm"):
+            answer = await llm.chat(messages, temperature=0.4, max_tokens=1024)
+    except LLMError as e:
+        metrics.record_llm_error(e)
+        trace.outcome = "llm_error"
+        return f"Error from Groq API: {e}", False
+    with trace.stage("finish"):
+        await run_blocking(bot.finish, user_input, answer, query_vector, session_id)
+    return answer, True
+
+
+async def stream_answer(user_input, session_id, trace, emit):
+    """Streaming counterpart of compute_answer(). Returns: True if the answer belongs in history."""
+    answer, messages, query_vector = await run_blocking(bot.prepare, user_input, session_id, trace)
+    if answer is not None:
+        emit(answer)
+        return trace.outcome != "fast_path"
+    parts = []
+    try:
+        with trace.stage("llm_stream"):
+            async for delta in llm.stream_chat(messages, temperature=0.4, max_tokens=1024):
+                parts.append(delta)
+                emit(delta)
+    except LLMError as e:
+        metrics.record_llm_error(e)
+        trace.outcome = "llm_error"
+        emit(f"Error from Groq API: {e}")
+        return False
+    with trace.stage("finish"):
+        await run_blocking(bot.finish, user_input, "".join(parts), query_vector, session_id)
+    return True
+
+
+async def get_response(request):
+    form = await request.form()
+    user_input = form["user_input"]
+    session_id = current_session(request)
+    trace = metrics.RequestTrace("get_response")
+    try:
+        key = await run_blocking(bot.flight_key, user_input, session_id)
+        (response, remember), leader = await flights.do(key, lambda: compute_answer(user_input, session_id, trace))
+        if not leader:
+            trace.outcome = "coalesced"
+            if remember:
+                await run_blocking(bot.conversations.append_turn, session_id, user_input, response)
+        trace.finish()
+    except Exception as e:
+        trace.error(e)
+        trace.finish("error")
+        response = f"Error: {str(e)[:50]}..."
+    return with_session(request, JSONResponse({"response": response}), session_id)
+
+
+async def stream_response(request):
+    form = await request.form()
+    user_input = form["user_input"]
+    session_id = current_session(request)
+
+    async def generate():
+        # Same server-sent events framing as the Flask /stream_response route
+        trace = metrics.RequestTrace("stream_response")
+        try:
+            key = await run_blocking(bot.flight_key, user_input, session_id)
+            stream, leader = flights.stream(
+                key, lambda emit: stream_answer(user_input, session_id, trace, emit)
+            )
+            if not leader:
+                trace.outcome = "coalesced"
+            async for delta in stream:
+                yield f"data: {json.dumps({'delta': delta})}\n\n"
+            if not leader and stream.result:
+                await run_blocking(bot.conversations.append_turn, session_id, user_input, stream.text)
+            trace.finish()
+        except Exception as e:
+            trace.error(e)
+            trace.finish("error")
+            yield f"data: {json.dumps({'delta': f'Error: {str(e)[:50]}...'})}\n\n"
+        finally:
+            trace.finish("abandoned")
+        yield "data: [DONE]\n\n"
+
+    response = StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    return with_session(request, response, session_id)
+
+
+async def metrics_endpoint(request):
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await llm.aclose()
+    executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route("/", index),
+        Route("/get_response", get_response, methods=["POST"]),
+        Route("/stream_response", stream_response, methods=["POST"]),
+        Route("/metrics", metrics_endpoint),
+    ],
+    lifespan=lifespan,
+)
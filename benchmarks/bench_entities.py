@@ -0,0 +1,87 @@
+"""
+Entity extraction throughput on synthetic chat logs: the previous
+nine-findall extractor vs the single-scan entity_scanner, serial and with a
+process pool.
+
+Usage: python benchmarks/bench_entities.py --messages 100000 --processes 4
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import entity_scanner  # noqa: E402
+
+TEMPLATES = [
+    "What is the fee for BS CS? Is it PKR {amount} per semester?",
+    "My exam is on {day}/{month}/2026 at {hour}:30 pm, room {room}",
+    "Please email me at student{room}@iqra.edu.pk or call 0300-{phone}",
+    "Check https://iqra.edu.pk/notice/{room} for the {pct}% scholarship",
+    "Admissions close on March {day}, 2026. Kya late fee Rs. {amount} hai?",
+    "assalam o alaikum, bus timing kya hai? mera roll number {room} hai",
+]
+
+
+def chat_log(count, rng):
+    return [
+        rng.choice(TEMPLATES).format(
+            amount=f"{rng.randint(5, 90)},000", day=rng.randint(1, 28), month=rng.randint(1, 12),
+            hour=rng.randint(8, 11), room=rng.randint(100, 999), phone=rng.randint(1000000, 9999999),
+            pct=rng.choice([25, 50, 100]),
+        )
+        for _ in range(count)
+    ]
+
+
+def findall_extract(text):
+    """The previous extractor: one re.findall pass per pattern."""
+    entities = {"dates": [], "times": [], "emails": [], "phones": [], "urls": [], "money": [], "percentages": []}
+    for pattern in [
+        r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}',
+        r'\d{4}[/-]\d{1,2}[/-]\d{1,2}',
+        r'\b(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},?\s+\d{4}\b',
+    ]:
+        entities["dates"].extend(re.findall(pattern, text, re.IGNORECASE))
+    entities["times"] = re.findall(r'\b\d{1,2}:\d{2}\s*(am|pm|AM|PM)?\b', text)
+    entities["emails"] = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
+    entities["phones"] = re.findall(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', text)
+    entities["urls"] = re.findall(r'https?://[^\s]+', text)
+    entities["money"] = re.findall(r'\$?\d+(?:,\d{3})*(?:\.\d{2})?', text)
+    entities["percentages"] = re.findall(r'\d+(?:\.\d+)?%', text)
+    return {k: v for k, v in entities.items() if v}
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    texts = chat_log(args.messages, random.Random(0))
+    runs = {
+        "findall_serial": timed(lambda: [findall_extract(t) for t in texts]),
+        "scanner_serial": timed(lambda: entity_scanner.extract_batch(texts)),
+        f"scanner_pool_{args.processes}": timed(
+            lambda: entity_scanner.extract_batch(texts, processes=args.processes, chunksize=2048)
+        ),
+    }
+    print(json.dumps({
+        "messages": args.messages,
+        "messages_per_sec": {name: round(args.messages / seconds) for name, seconds in runs.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
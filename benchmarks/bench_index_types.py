@@ -0,0 +1,68 @@
+"""
+Index type trade-off tool: recall@k against exact search, query latency and
+serialized size for every index_factory type, built from the chunk embeddings
+of the current knowledge base. Use it to pick KB_INDEX_TYPE per deployment.
+
+--scale grows the corpus with jittered copies of the real vectors to preview
+how each type behaves on a much larger document dump.
+
+Usage: python benchmarks/bench_index_types.py --top-k 5 --queries 200 --scale 50000
+"""
+
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import index_factory  # noqa: E402
+from knowledge_base_engine import KnowledgeBaseEngine  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--types", nargs="+", default=list(index_factory.INDEX_TYPES))
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scale", type=int, default=0, help="synthetic corpus size (0 = real chunks only)")
+    parser.add_argument("--nprobe", type=int, default=index_factory.DEFAULT_PARAMS["nprobe"])
+    parser.add_argument("--ef-search", type=int, default=index_factory.DEFAULT_PARAMS["ef_search"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    engine = KnowledgeBaseEngine()
+    if engine.index is None:
+        engine.ingest_directory("knowledge_base")
+    texts = [record["text"] for _, record in sorted(engine.metadata.items())]
+    vectors = np.array(engine.model.encode(texts), dtype="float32")
+
+    rng = np.random.default_rng(args.seed)
+    spread = float(vectors.std())
+    if args.scale > len(vectors):
+        picks = rng.integers(0, len(vectors), args.scale - len(vectors))
+        noise = rng.normal(0, spread * 0.5, (len(picks), vectors.shape[1])).astype("float32")
+        vectors = np.vstack([vectors, vectors[picks] + noise])
+
+    # Queries: corpus vectors nudged off their exact position
+    picks = rng.integers(0, len(vectors), args.queries)
+    queries = vectors[picks] + rng.normal(0, spread * 0.3, (args.queries, vectors.shape[1])).astype("float32")
+
+    results = index_factory.evaluate(
+        vectors, queries, args.types, args.top_k,
+        params={"nprobe": args.nprobe, "ef_search": args.ef_search},
+    )
+    print(json.dumps({
+        "vectors": len(vectors),
+        "dimension": int(vectors.shape[1]),
+        "queries": args.queries,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Intent matching microbenchmark: the original per-keyword/per-pattern loop vs
+the compiled IntentMatcher, on synthetic intent tables of growing size.
+Results are checked for equality before timing.
+
+Usage: python benchmarks/bench_intent.py --intents 12 50 200 800 --texts 2000
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from advanced_nlp_engine import AdvancedNLPEngine  # noqa: E402
+from intent_matcher import IntentMatcher  # noqa: E402
+
+
+def synthetic_table(base, count, rng):
+    """Real intents plus generated ones (random Roman-Urdu-like words) up to count."""
+    table = dict(base)
+    while len(table) < count:
+        words = ["".join(rng.choice("abcdefghiklmnoprstuyz") for _ in range(rng.randint(3, 8))) for _ in range(8)]
+        table[f"intent_{len(table)}"] = {
+            "keywords": words[:6],
+            "patterns": [rf"\b{words[6]}\b", rf"{words[7]} ?(kya|hai)"],
+        }
+    return table
+
+
+def loop_scores(table, text):
+    """The pre-automaton detect_intent scoring."""
+    text_lower = text.lower()
+    scores = {}
+    for intent, data in table.items():
+        score = sum(2 for keyword in data["keywords"] if keyword in text_lower)
+        score += sum(3 for pattern in data["patterns"] if re.search(pattern, text_lower))
+        if score > 0:
+            scores[intent] = score
+    if not scores:
+        return None, 0
+    best = max(scores, key=scores.get)
+    return best, scores[best]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--intents", type=int, nargs="+", default=[12, 50, 200, 800])
+    parser.add_argument("--texts", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    base = AdvancedNLPEngine().intent_patterns
+    results = []
+    for count in args.intents:
+        table = synthetic_table(base, count, rng)
+        vocabulary = [k for data in table.values() for k in data["keywords"]] + ["the", "is", "for", "?", "mera", "please"]
+        texts = [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(3, 12))) for _ in range(args.texts)]
+
+        start = time.perf_counter()
+        matcher = IntentMatcher(table)
+        compile_seconds = time.perf_counter() - start
+
+        assert all(loop_scores(table, t) == matcher.best(t.lower()) for t in texts[:200])
+
+        start = time.perf_counter()
+        for text in texts:
+            loop_scores(table, text)
+        loop_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for text in texts:
+            matcher.best(text.lower())
+        matcher_seconds = time.perf_counter() - start
+
+        results.append({
+            "intents": count,
+            "compile_ms": round(compile_seconds * 1000, 2),
+            "loop_texts_per_sec": round(len(texts) / loop_seconds),
+            "matcher_texts_per_sec": round(len(texts) / matcher_seconds),
+            "speedup": round(loop_seconds / matcher_seconds, 1),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
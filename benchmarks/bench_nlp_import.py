@@ -0,0 +1,51 @@
+"""
+Cold-start benchmark for advanced_nlp_engine: times `import` + constructing
+AdvancedNLPEngine + one detect_intent call in fresh interpreters, and fails
+when the median exceeds the threshold (use it as a CI guard).
+
+Usage: python benchmarks/bench_nlp_import.py --runs 5 --max-seconds 0.5
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = (
+    "import time; start = time.perf_counter(); "
+    "import advanced_nlp_engine; engine = advanced_nlp_engine.AdvancedNLPEngine(); "
+    "engine.detect_intent('What is the fee for BS CS?'); "
+    "print(time.perf_counter() - start)"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    timings = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+
+    median = statistics.median(timings)
+    print(json.dumps({
+        "runs": args.runs,
+        "median_seconds": round(median, 4),
+        "max_seconds": round(max(timings), 4),
+        "threshold_seconds": args.max_seconds,
+        "passed": median <= args.max_seconds,
+    }, indent=2))
+    sys.exit(0 if median <= args.max_seconds else 1)
+
+
+if __name__ == "__main__":
+    main()
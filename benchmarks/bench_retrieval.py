@@ -0,0 +1,214 @@
+"""
+Retrieval benchmark: builds a fresh KnowledgeBaseEngine index from
+knowledge_base/ in a temporary directory (the repo's own index files are not
+touched) and scores it against the gold questions in retrieval_gold.json.
+
+Reports recall@k, MRR, p50/p95/p99 search latency, ingest time and on-disk
+index size as JSON. Save a run with --output and compare later runs with
+--baseline; --max-drop makes the script exit 1 when recall or MRR regress by
+more than that amount, so it can gate retrieval and index changes.
+
+Progress and engine logs go to stderr; stdout is the result JSON only.
+
+Usage: python benchmarks/bench_retrieval.py --index-type flat --output baseline.json
+       python benchmarks/bench_retrieval.py --index-type ivf_sq8 --baseline baseline.json --max-drop 0.02
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import index_factory  # noqa: E402
+from knowledge_base_engine import KnowledgeBaseEngine  # noqa: E402
+
+GOLD_PATH = os.path.join(ROOT, "benchmarks", "retrieval_gold.json")
+KS = (1, 3, 5, 10)
+# Metrics where higher is better; everything else in "latency_ms" is lower-is-better
+QUALITY_KEYS = [f"recall_at_{k}" for k in KS] + ["mrr"]
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def is_relevant(hit, item):
+    if os.path.basename(hit.source) not in item["sources"]:
+        return False
+    phrase = item.get("contains")
+    return not phrase or phrase.lower() in hit.text.lower()
+
+
+def build_engine(workdir, args):
+    """Creates an engine whose index files all live in workdir and ingests the corpus."""
+    paths = {
+        "db_path": "iqra_brain.index",
+        "metadata_path": "iqra_metadata.pkl",
+        "manifest_path": "iqra_manifest.json",
+        "bm25_path": "iqra_bm25.npz",
+        "facts_path": "iqra_facts.json",
+        "chunks_path": "iqra_chunks.jsonl",
+        "chunk_offsets_path": "iqra_chunks.idx.npy",
+    }
+    engine = KnowledgeBaseEngine(
+        model_name=args.model,
+        index_type=args.index_type,
+        hybrid=not args.dense_only,
+        hybrid_alpha=args.alpha,
+        **{key: os.path.join(workdir, name) for key, name in paths.items()},
+    )
+    start = time.perf_counter()
+    engine.ingest_directory(args.corpus, force=True, workers=args.workers)
+    ingest_seconds = time.perf_counter() - start
+
+    index_bytes = os.path.getsize(engine.db_path)
+    total_bytes = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir))
+    return engine, {
+        "ingest_seconds": round(ingest_seconds, 3),
+        "chunks": int(engine.index.ntotal),
+        "index_bytes": index_bytes,
+        "total_bytes": total_bytes,
+    }
+
+
+def score(engine, questions, top_k, shards=None):
+    """Returns: (quality metrics, per-question misses)"""
+    found = {k: 0 for k in KS}
+    reciprocal_ranks = 0.0
+    misses = []
+    for item in questions:
+        hits = engine.search(item["question"], top_k=top_k, shards=shards)
+        rank = next((i + 1 for i, hit in enumerate(hits) if is_relevant(hit, item)), None)
+        for k in KS:
+            if rank is not None and rank <= k:
+                found[k] += 1
+        if rank is None:
+            misses.append({
+                "id": item["id"],
+                "top_sources": [os.path.basename(hit.source) for hit in hits[:3]],
+            })
+        else:
+            reciprocal_ranks += 1.0 / rank
+
+    quality = {f"recall_at_{k}": round(found[k] / len(questions), 4) for k in KS if k <= top_k}
+    quality["mrr"] = round(reciprocal_ranks / len(questions), 4)
+    return quality, misses
+
+
+def time_searches(engine, questions, top_k, rounds, cached, shards=None):
+    """
+    Times engine.search per question. Uncached runs clear the query embedding
+    cache first, so the numbers include encoding the question.
+    """
+    latencies = []
+    for _ in range(rounds):
+        for item in questions:
+            if not cached:
+                engine.query_cache.clear()
+            start = time.perf_counter()
+            engine.search(item["question"], top_k=top_k, shards=shards)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "p50": round(percentile(latencies, 0.50), 3),
+        "p95": round(percentile(latencies, 0.95), 3),
+        "p99": round(percentile(latencies, 0.99), 3),
+        "mean": round(sum(latencies) / len(latencies), 3),
+    }
+
+
+def compare(result, baseline):
+    """Returns: dict of metric -> {baseline, current, delta} for metrics present in both."""
+    deltas = {}
+    sections = [("quality", QUALITY_KEYS), ("latency_ms", None), ("latency_ms_cached", None), ("ingest", None)]
+    for section, keys in sections:
+        current, previous = result.get(section, {}), baseline.get(section, {})
+        for key in keys or current:
+            if key in current and key in previous:
+                deltas[f"{section}.{key}"] = {
+                    "baseline": previous[key],
+                    "current": current[key],
+                    "delta": round(current[key] - previous[key], 4),
+                }
+    return deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gold", default=GOLD_PATH)
+    parser.add_argument("--corpus", default=os.path.join(ROOT, "knowledge_base"))
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--index-type", default="flat", choices=list(index_factory.INDEX_TYPES))
+    parser.add_argument("--dense-only", action="store_true", help="disable BM25 fusion")
+    parser.add_argument("--alpha", type=float, default=0.5, help="hybrid weight of the dense score")
+    parser.add_argument("--shards", choices=["all", "auto"], default="all",
+                        help="search every chunk, or route each question to its domain shards")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5, help="latency passes over the gold set")
+    parser.add_argument("--workers", type=int, default=None, help="chunking processes during ingest")
+    parser.add_argument("--output", help="write the result JSON here (e.g. to store a baseline)")
+    parser.add_argument("--baseline", help="earlier result JSON to compare against")
+    parser.add_argument("--max-drop", type=float, default=None,
+                        help="exit 1 if recall@k or MRR fall more than this below the baseline")
+    args = parser.parse_args()
+
+    with open(args.gold, "r", encoding="utf-8") as f:
+        questions = json.load(f)["questions"]
+
+    workdir = tempfile.mkdtemp(prefix="iqra_bench_")
+    try:
+        # Engine logging goes to stderr, so stdout carries only the result JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            engine, ingest = build_engine(workdir, args)
+            shards = "auto" if args.shards == "auto" else None
+            quality, misses = score(engine, questions, args.top_k, shards)
+            result = {
+                "config": {
+                    "model": args.model,
+                    "index_type": args.index_type,
+                    "index_description": engine.manifest.get("index_description"),
+                    "hybrid": not args.dense_only,
+                    "alpha": args.alpha,
+                    "shards": args.shards,
+                    "top_k": args.top_k,
+                    "questions": len(questions),
+                    "rounds": args.rounds,
+                },
+                "quality": quality,
+                "latency_ms": time_searches(engine, questions, args.top_k, args.rounds, False, shards),
+                "latency_ms_cached": time_searches(engine, questions, args.top_k, args.rounds, True, shards),
+                "ingest": ingest,
+                "misses": misses,
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            result["comparison"] = compare(result, json.load(f))
+        if args.max_drop is not None:
+            regressions = [
+                name for name, values in result["comparison"].items()
+                if name.split(".", 1)[1] in QUALITY_KEYS and values["delta"] < -args.max_drop
+            ]
+            result["regressions"] = regressions
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Serving benchmark: Flask (gunicorn sync workers) vs the async ASGI server.
+Both talk to the local stub LLM, so the numbers isolate how many
+conversations a deployment can keep in flight while Groq is "thinking".
+
+Usage: python benchmarks/bench_serving.py --requests 200 --concurrency 50 --llm-latency 1.0
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start(command, env):
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+
+
+def wait_until_ready(url, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not start within {timeout}s")
+
+
+async def load(url, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(timeout=300, limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    # Distinct questions so the semantic answer cache cannot short-circuit
+                    response = await client.post(url, data={"user_input": f"Question {i}: what are the transport timings?"})
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else None
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency_p50_s": percentile(0.50),
+        "latency_p95_s": percentile(0.95),
+    }
+
+
+def run_target(name, command, port, env, args):
+    process = start(command, env)
+    try:
+        wait_until_ready(f"http://127.0.0.1:{port}/")
+        result = asyncio.run(load(f"http://127.0.0.1:{port}/get_response", args.requests, args.concurrency))
+    finally:
+        process.terminate()
+        process.wait()
+    result["server"] = name
+    print(f"{name:>8}: {result['throughput_rps']} req/s, p50 {result['latency_p50_s']}s, "
+          f"p95 {result['latency_p95_s']}s, errors {result['errors']}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flask vs ASGI serving benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--flask-workers", type=int, default=2)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    env["GROQ_BASE_URL"] = "http://127.0.0.1:8900/v1"
+    env["ANSWER_CACHE_THRESHOLD"] = "2.0"  # disable semantic answer reuse
+
+    stub = start([sys.executable, "benchmarks/stub_llm_server.py", "--port", "8900",
+                  "--latency", str(args.llm_latency)], env)
+    try:
+        time.sleep(1)
+        results = [
+            run_target("flask", ["gunicorn", "-w", str(args.flask_workers), "-b", "127.0.0.1:8901", "app:app"],
+                       8901, env, args),
+            run_target("asgi", [sys.executable, "-m", "uvicorn", "asgi_app:app", "--port", "8902",
+                                "--log-level", "warning"], 8902, env, args),
+        ]
+    finally:
+        stub.terminate()
+
+    report = {"config": vars(args), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Stub OpenAI-compatible chat completions server for offline benchmarks.
+Answers POST /v1/chat/completions (streaming and non-streaming) after a fixed
+delay, standing in for Groq via GROQ_BASE_URL=http://127.0.0.1:<port>/v1
+
+Usage: python benchmarks/stub_llm_server.py --port 8900 --latency 1.0
+"""
+
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = "This is a canned answer from the stub LLM server used for benchmarking."
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 1.0
+
+    def log_message(self, *args):
+        pass
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        words = REPLY.split(" ")
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            # Spread the configured latency across tokens, like a real model
+            for i, word in enumerate(words):
+                time.sleep(self.latency / len(words))
+                delta = word if i == 0 else " " + word
+                event = {"choices": [{"index": 0, "delta": {"content": delta}}]}
+                self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+
+        time.sleep(self.latency)
+        result = json.dumps({
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY}}],
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(result)))
+        self.end_headers()
+        self.wfile.write(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per completion")
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    server.daemon_threads = True
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/v1 (latency {args.latency}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+BM25 Inverted Index
+Compact lexical index over knowledge-base chunks. Postings are stored in
+flat numpy arrays (CSR layout) and persisted as a single .npz file next to
+the FAISS index, so exact name/course lookups ("Shahzad Karim", "COAL")
+can be fused with dense retrieval.
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "the", "to", "was", "what", "who", "with", "ka",
+    "ki", "ke", "hai", "kya",
+])
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens without stop words."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+class BM25Index:
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocabulary = {}
+        self.doc_ids = np.zeros(0, dtype="int64")
+        self.doc_lengths = np.zeros(0, dtype="float32")
+        self.postings_offsets = np.zeros(1, dtype="int64")
+        self.postings_docs = np.zeros(0, dtype="int32")
+        self.postings_tfs = np.zeros(0, dtype="float32")
+        self.idf = np.zeros(0, dtype="float32")
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def build(self, documents):
+        """
+        Builds the index from (chunk_id, text) pairs.
+        Returns: self
+        """
+        vocabulary = {}
+        doc_ids = []
+        doc_lengths = []
+        term_ids = []
+        positions = []
+        tfs = []
+
+        for position, (chunk_id, text) in enumerate(documents):
+            tokens = tokenize(text)
+            doc_ids.append(chunk_id)
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                positions.append(position)
+                tfs.append(tf)
+
+        term_ids = np.array(term_ids, dtype="int64")
+        order = np.argsort(term_ids, kind="stable")
+        counts = np.bincount(term_ids, minlength=len(vocabulary))
+
+        self.vocabulary = vocabulary
+        self.doc_ids = np.array(doc_ids, dtype="int64")
+        self.doc_lengths = np.array(doc_lengths, dtype="float32")
+        self.postings_offsets = np.concatenate([[0], np.cumsum(counts)]).astype("int64")
+        self.postings_docs = np.array(positions, dtype="int32")[order]
+        self.postings_tfs = np.array(tfs, dtype="float32")[order]
+        n_docs = len(doc_ids)
+        self.idf = np.log(1.0 + (n_docs - counts + 0.5) / (counts + 0.5)).astype("float32")
+        return self
+
+    def search(self, query, top_k=5, mask=None):
+        """
+        Scores every chunk containing a query term.
+        mask: optional boolean array aligned with doc_ids; False chunks are skipped
+        Returns: list of (chunk_id, bm25_score), best first
+        """
+        if not len(self.doc_ids):
+            return []
+
+        scores = np.zeros(len(self.doc_ids), dtype="float32")
+        avg_length = float(self.doc_lengths.mean()) or 1.0
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.postings_offsets[term_id], self.postings_offsets[term_id + 1]
+            docs = self.postings_docs[start:end]
+            tf = self.postings_tfs[start:end]
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[docs] / avg_length)
+            scores[docs] += self.idf[term_id] * tf * (self.k1 + 1.0) / (tf + norm)
+
+        if mask is not None:
+            scores[~mask] = 0.0
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        matched = matched[np.argsort(-scores[matched])]
+        return [(int(self.doc_ids[p]), float(scores[p])) for p in matched]
+
+    def coverage(self, query, text):
+        """
+        Share of the query's IDF weight carried by terms that occur in text.
+        Terms the corpus has never seen count as the rarest term, so "weather
+        on Mars" is poorly covered by any chunk that only shares "today".
+        Returns: 0.0 - 1.0
+        """
+        terms = set(tokenize(query))
+        if not terms or not len(self.idf):
+            return 0.0
+        rarest = float(self.idf.max())
+        weights = {t: float(self.idf[self.vocabulary[t]]) if t in self.vocabulary else rarest for t in terms}
+        present = set(tokenize(text))
+        total = sum(weights.values())
+        return sum(w for t, w in weights.items() if t in present) / total if total else 0.0
+
+    def save(self, path):
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez(
+            path,
+            terms=np.array(terms, dtype="U"),
+            doc_ids=self.doc_ids,
+            doc_lengths=self.doc_lengths,
+            postings_offsets=self.postings_offsets,
+            postings_docs=self.postings_docs,
+            postings_tfs=self.postings_tfs,
+            idf=self.idf,
+            params=np.array([self.k1, self.b], dtype="float32"),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            index = cls(k1=float(data["params"][0]), b=float(data["params"][1]))
+            index.vocabulary = {term: i for i, term in enumerate(data["terms"].tolist())}
+            index.doc_ids = data["doc_ids"]
+            index.doc_lengths = data["doc_lengths"]
+            index.postings_offsets = data["postings_offsets"]
+            index.postings_docs = data["postings_docs"]
+            index.postings_tfs = data["postings_tfs"]
+            index.idf = data["idf"]
+        return index
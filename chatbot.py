@@ -1,14 +1,23 @@
 
 import os
-import requests
-import json
 from dotenv import load_dotenv
-# Import RAG Engine
-from knowledge_base_engine import KnowledgeBaseEngine
+# Import RAG Engine (shared per process)
+from model_registry import registry
+from answer_cache import SemanticAnswerCache
+from context_assembler import ContextAssembler
+from llm_client import LLMClient, LLMError
+from session_store import ConversationStore
+from fast_path import FastPathRouter
+from singleflight import SingleFlight, flight_key
+from knowledge_base_engine import estimate_tokens
+import metrics
 
 # Load environment variables
 load_dotenv()
 
+# History bucket for callers that do not track sessions (CLI, scripts)
+DEFAULT_SESSION = "default"
+
 class ChatBot:
     def __init__(self):
         # Load Groq API key from End/Secrets
@@ -28,55 +37,161 @@ class ChatBot:
         if not self.api_key:
             raise ValueError("No GROQ_API_KEY found. Please set it in your .env file or Streamlit Secrets.")
             
-        # Initialize RAG Engine (Iqra Virtual Brain)
-        self.kb = KnowledgeBaseEngine()
+        # Pooled Groq client (keep-alive, timeouts, retry with backoff)
+        self.llm = LLMClient(self.api_key)
+            
+        # Initialize RAG Engine (Iqra Virtual Brain): loaded once per process and
+        # shared read-only by every ChatBot / browser session
+        self.kb = registry.get_engine('knowledge_base')
+        
+        # RETRIEVAL CUTOFFS: Skip weakly related chunks instead of always sending top_k
+        self.max_context_distance = float(os.getenv("KB_MAX_DISTANCE", "1.5"))
         
-        # Auto-ingest if index is missing but data exists
-        if self.kb.index is None and os.path.exists('knowledge_base'):
-            print("No index found. Ingesting knowledge_base for the first time...")
-            self.kb.ingest_directory('knowledge_base')
+        # CONTEXT ASSEMBLY: Merge overlapping chunks, drop duplicates, fit a token budget
+        self.assembler = ContextAssembler(
+            token_budget=int(os.getenv("KB_MAX_CONTEXT_TOKENS", "1800"))
+        )
         
-        # CONVERSATION MEMORY: Keep track of history like ChatGPT
-        self.history = []
+        # SEMANTIC ANSWER CACHE: Near-identical questions reuse a previous Groq answer
+        # (one cache per process, shared by every ChatBot / browser session)
+        self.answer_cache = registry.get_shared("answer_cache", lambda: SemanticAnswerCache(
+            similarity_threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92")),
+            max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "512")),
+            ttl_seconds=int(os.getenv("ANSWER_CACHE_TTL", "21600")),
+            persist_path=os.getenv("ANSWER_CACHE_PATH"),
+            save_interval=float(os.getenv("ANSWER_CACHE_SAVE_SECONDS", "30")),
+        ))
+        
+        # CONVERSATION MEMORY: Per-session ring buffers with idle-session eviction
+        self.conversations = ConversationStore.from_env()
 
-    def get_response(self, user_input):
-        try:
-            # Check for specific questions about LLM/API
-            if any(k in user_input.lower() for k in ["which llm", "what llm", "what model"]):
-                return "I am powered by Llama 3.1 8B via Groq ultra-fast inference engine."
-
-            # Check for creator questions
-            if any(keyword in user_input.lower() for keyword in [
-                "who made you", "who created you", "who designed you", "who developed you",
-                "creator", "developer", "designer", "makers", "developers",
-                "kis ne banaya", "kisne banaya", "tumhe kisne banaya", "owner"
-            ]):
-                return "I was created by Iqra University team Sajjad Baloch to serve as a conversational AI assistant for students."
-
-            # 1. RETRIEVE context from knowledge base (RAG)
-            search_k = 5
-            person_keywords = ["teacher", "faculty", "staff", "lecturer", "professor", "list", "who is", "about", "info", "information", "how many", "total", "count", "all", "schedule", "free", "time", "when", "class", "shadule"]
-            if any(k in user_input.lower() for k in person_keywords) or len(user_input.split()) < 5:
-                # Increase context size for lists (12*600 = 7.2k chars ~ 1.8k tokens) - Safe for Groq
-                search_k = 12
-                
-            dynamic_context = self.kb.search(user_input, top_k=search_k)
-
-            # SPECIAL TRIGGER: If asking for full teacher list/count, inject the full directory file
-            # This fixes the issue where RAG only returns a few chunks (e.g. 15 teachers instead of 55)
-            if any(k in user_input.lower() for k in ["how many", "count", "list", "all", "total"]) and \
-               any(k in user_input.lower() for k in ["teacher", "faculty", "staff", "professor"]):
-                try:
-                    with open(os.path.join('knowledge_base', 'iqra_faculty_directory.txt'), 'r', encoding='utf-8') as f:
-                        full_directory = f.read()
-                        dynamic_context += f"\n\n=== FULL FACULTY DIRECTORY ===\n{full_directory}\n"
-                except Exception as e:
-                    print(f"Error reading directory file: {e}")
-            
-            # 2. CALL GROQ API via requests
-            url = "https://api.groq.com/openai/v1/chat/completions"
+        # FAST PATH: Small talk and questions about the bot are answered from a reply table
+        self.fast_path = FastPathRouter.from_env()
+
+        # REQUEST COALESCING: Identical questions asked at the same time share one answer,
+        # across every ChatBot in the process
+        self.flights = registry.get_shared("singleflight", SingleFlight)
+
+        # METRICS: Cache and Groq counters are read from their owners when /metrics is scraped
+        metrics.registry.register_collector("llm", lambda: metrics.llm_client_metrics(self.llm))
+        metrics.registry.register_collector("caches", self._cache_metrics)
+        metrics.registry.register_collector("fast_path", self._fast_path_metrics)
+        metrics.registry.register_collector("shards", self._shard_metrics)
+        metrics.registry.register_collector(
+            "singleflight", lambda: metrics.singleflight_metrics(self.flights.stats(), "threads")
+        )
+
+    def _cache_metrics(self):
+        return (
+            metrics.cache_metrics("query_cache", self.kb.query_cache.stats())
+            + metrics.cache_metrics("answer_cache", self.answer_cache.stats())
+        )
+
+    def _fast_path_metrics(self):
+        stats = self.fast_path.stats()
+        return [
+            ("neura_fast_path_requests_total", "counter", "Messages checked by the fast-path router.",
+             [({}, stats["requests"])]),
+            ("neura_fast_path_served_total", "counter", "Messages answered locally by the fast-path router.",
+             [({"intent": intent}, count) for intent, count in sorted(stats["by_intent"].items())]),
+        ]
+
+    def _shard_metrics(self):
+        stats = self.kb.shard_stats()
+        return [
+            ("neura_shard_routed_total", "counter", "Searches routed to specific shards, by shard.",
+             [({"shard": shard}, count) for shard, count in sorted(stats.get("by_shard", {}).items())]),
+            ("neura_shard_fanout_total", "counter", "Searches over every shard (no clear domain).",
+             [({}, stats.get("fanned_out", 0))]),
+            ("neura_shard_fallbacks_total", "counter", "Routed searches retried across every shard.",
+             [({}, stats["fallbacks"])]),
+        ]
+
+    @staticmethod
+    def _record_prompt(messages, context):
+        prompt_chars = sum(len(m["content"]) for m in messages)
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        metrics.registry.inc("neura_prompt_chars_total", prompt_chars)
+        metrics.registry.inc("neura_prompt_tokens_total", prompt_tokens)
+        metrics.registry.observe("neura_prompt_tokens", prompt_tokens)
+        metrics.registry.inc("neura_context_chunks_total", context.chunks_in, kind="retrieved")
+        metrics.registry.inc("neura_context_chunks_total", context.segments_used, kind="used")
+        metrics.registry.inc("neura_context_tokens_saved_total", context.tokens_saved)
+
+    def _remember(self, session_id, user_input, bot_response):
+        self.conversations.append_turn(session_id, user_input, bot_response)
+
+    def prepare(self, user_input, session_id=DEFAULT_SESSION, trace=None):
+        """
+        Runs the local shortcuts, cache lookup and retrieval for one question.
+        Each step is timed as a stage of trace (a metrics.RequestTrace).
+        Returns: (answer, None, None) when answered without the LLM,
+                 else (None, messages, query_vector) ready for Groq;
+                 query_vector is None for follow-ups, which are not cached
+        """
+        trace = trace or metrics.RequestTrace("prepare")
+
+        with trace.stage("shortcuts"):
+            # Greetings, thanks, goodbyes and "which llm" / "who made you" questions
+            routed = self.fast_path.route(user_input)
+            if routed is not None:
+                trace.outcome = "fast_path"
+                return routed[1], None, None
+
+            # Count questions ("how many teachers") are answered from the fact table
+            local_answer = self.kb.facts.answer_count(user_input)
+            if local_answer:
+                self._remember(session_id, user_input, local_answer)
+                trace.outcome = "local"
+                return local_answer, None, None
+
+        with trace.stage("history"):
+            history = self.conversations.history(session_id)
+
+        # 0. SEMANTIC CACHE: Reuse the answer of an equivalent question for this KB version.
+        # Follow-ups ("what about MS?") depend on their conversation, so only
+        # questions without history are looked up and stored.
+        with trace.stage("encode"):
+            query_vector = self.kb.encode_query(user_input)
+        if not history:
+            with trace.stage("answer_cache"):
+                cached_response = self.answer_cache.lookup(query_vector, self.kb.version)
+            if cached_response is not None:
+                self._remember(session_id, user_input, cached_response)
+                trace.outcome = "cache"
+                return cached_response, None, None
+
+        # 1. RETRIEVE context from knowledge base (RAG)
+        search_k = 5
+        person_keywords = ["teacher", "faculty", "staff", "lecturer", "professor", "list", "who is", "about", "info", "information", "how many", "total", "count", "all", "schedule", "free", "time", "when", "class", "shadule"]
+        if any(k in user_input.lower() for k in person_keywords) or len(user_input.split()) < 5:
+            # Increase context size for lists (8*600 = 4.8k chars ~ 1.2k tokens)
+            # Hybrid BM25 + dense search already ranks exact name/course matches first
+            search_k = 8
             
-            system_prompt = f"""You are NEURA v2.4, an ultra-intelligent and helpful AI assistant for Iqra University. 
+        # Only the domain shards the question is about (fees, faculty, ...) are searched
+        with trace.stage("search"):
+            hits = self.kb.search(
+                user_input,
+                top_k=search_k,
+                max_distance=self.max_context_distance,
+                shards="auto",
+            )
+
+        # STRUCTURED FACTS: Add only the faculty/fee rows the question refers to
+        # (replaces pasting the full faculty directory file into every list query)
+        with trace.stage("facts"):
+            sections = [
+                ("FACULTY TABLE", self.kb.facts.faculty_context(user_input)),
+                ("FEE TABLE", self.kb.facts.fee_context(user_input)),
+            ]
+        
+        with trace.stage("assemble"):
+            context = self.assembler.assemble(hits, sections)
+        dynamic_context = context.text
+        
+        # 2. CALL GROQ API via the pooled client
+        system_prompt = f"""You are NEURA v2.4, an ultra-intelligent and helpful AI assistant for Iqra University. 
 Your goal is to behave like ChatGPT but with specialized knowledge of Iqra University.
 
 GUIDELINES:
@@ -96,45 +211,141 @@ If the answer is NOT in the context, use your general knowledge to answer helpfu
 NEVER say "I don't have information" unless it's a very specific private query (like a student's personal phone number).
 For teachers/courses not in context, give a general polite response about checking the official portal."""
 
-            # Construct messages
+        # Construct messages
+        with trace.stage("history"):
             messages = [{"role": "system", "content": system_prompt}]
             
-            # Add history
-            for h in self.history[-8:]:
-                messages.append(h)
+            # Add this session's recent history
+            messages.extend(history)
                 
             # Add current user input
             messages.append({"role": "user", "content": user_input})
 
-            payload = {
-                "model": "llama-3.1-8b-instant",
-                "messages": messages,
-                "temperature": 0.4,
-                "max_tokens": 1024
-            }
-            
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(url, headers=headers, json=payload)
-            
-            if response.status_code == 200:
-                result = response.json()
-                bot_response = result['choices'][0]['message']['content']
-                
-                # Update history
-                self.history.append({"role": "user", "content": user_input})
-                self.history.append({"role": "assistant", "content": bot_response})
-                
-                return bot_response
-            else:
-                return f"Error from Groq API: {response.status_code} - {response.text[:200]}"
+        self._record_prompt(messages, context)
+        return None, messages, None if history else query_vector
+
+    def finish(self, user_input, bot_response, query_vector, session_id=DEFAULT_SESSION):
+        """Caches a completed LLM answer (unless it was a follow-up) and records the turn in history."""
+        if query_vector is not None:
+            self.answer_cache.store(query_vector, bot_response, self.kb.version, question=user_input)
+        
+        # Update history
+        self._remember(session_id, user_input, bot_response)
+
+    def flight_key(self, user_input, session_id=DEFAULT_SESSION):
+        """
+        Returns: key under which concurrent identical questions are coalesced.
+        Follow-ups depend on the conversation, so sessions with history only
+        share an answer with the same conversation.
+        """
+        return flight_key(user_input, self.kb.version, self.conversations.history(session_id))
+
+    def _answer(self, user_input, session_id, trace):
+        """
+        Runs the whole pipeline for one question (the single-flight leader's work).
+        Returns: (answer, True if it belongs in the conversation history)
+        """
+        answer, messages, query_vector = self.prepare(user_input, session_id, trace)
+        if answer is not None:
+            # Fast-path small talk is not kept in history
+            return answer, trace.outcome != "fast_path"
+
+        try:
+            with trace.stage("llm"):
+                bot_response = self.llm.chat(messages, temperature=0.4, max_tokens=1024)
+        except LLMError as e:
+            metrics.record_llm_error(e)
+            trace.outcome = "llm_error"
+            return f"Error from Groq API: {e}", False
+
+        with trace.stage("finish"):
+            self.finish(user_input, bot_response, query_vector, session_id)
+        return bot_response, True
+
+    def _stream_answer(self, user_input, session_id, trace, emit):
+        """
+        Streaming counterpart of _answer: passes answer text to emit as Groq
+        streams it.
+        Returns: True if the answer belongs in the conversation history
+        """
+        answer, messages, query_vector = self.prepare(user_input, session_id, trace)
+        if answer is not None:
+            emit(answer)
+            return trace.outcome != "fast_path"
+
+        parts = []
+        try:
+            deltas = self.llm.stream_chat(messages, temperature=0.4, max_tokens=1024)
+            with trace.stage("llm_first_token"):
+                first = next(deltas, None)
+            if first is not None:
+                parts.append(first)
+                emit(first)
+            with trace.stage("llm_stream"):
+                for delta in deltas:
+                    parts.append(delta)
+                    emit(delta)
+        except LLMError as e:
+            metrics.record_llm_error(e)
+            trace.outcome = "llm_error"
+            emit(f"Error from Groq API: {e}")
+            return False
+
+        with trace.stage("finish"):
+            self.finish(user_input, "".join(parts), query_vector, session_id)
+        return True
+
+    def get_response(self, user_input, session_id=DEFAULT_SESSION):
+        trace = metrics.RequestTrace("get_response")
+        try:
+            # Concurrent duplicates wait for the first request's answer instead of
+            # repeating encode -> search -> Groq
+            (answer, remember), leader = self.flights.do(
+                self.flight_key(user_input, session_id),
+                lambda: self._answer(user_input, session_id, trace),
+            )
+            if not leader:
+                trace.outcome = "coalesced"
+                if remember:
+                    self._remember(session_id, user_input, answer)
+            trace.finish()
+            return answer
 
         except Exception as e:
+            trace.error(e)
+            trace.finish("error")
             return f"Error: {str(e)[:50]}..."
 
+    def stream_response(self, user_input, session_id=DEFAULT_SESSION):
+        """
+        Generator version of get_response: yields answer text as Groq streams it,
+        so the first words reach the user before the completion is finished.
+        The answer is produced in a background thread and shared with identical
+        questions that arrive while it streams; each of them replays it from
+        the start.
+        """
+        trace = metrics.RequestTrace("stream_response")
+        try:
+            stream, leader = self.flights.stream(
+                self.flight_key(user_input, session_id),
+                lambda emit: self._stream_answer(user_input, session_id, trace, emit),
+            )
+            if not leader:
+                trace.outcome = "coalesced"
+            yield from stream
+            if not leader and stream.result:
+                self._remember(session_id, user_input, stream.text)
+            trace.finish()
+
+        except Exception as e:
+            trace.error(e)
+            trace.finish("error")
+            yield f"Error: {str(e)[:50]}..."
+        finally:
+            # Client went away mid-stream (no-op when already finished); the
+            # answer still completes for coalesced requests and the cache
+            trace.finish("abandoned")
+
 if __name__ == "__main__":
     bot = ChatBot()
     print("Bot ready (Groq Enabled). Type 'quit' to exit.")
@@ -0,0 +1,85 @@
+"""
+Chunk Store
+Flat on-disk chunk records: one UTF-8 JSON line per chunk in a data file plus
+a sorted (vector_id, start, end) offset table. Both files are opened with
+mmap, so every gunicorn worker reads the same page-cache pages instead of
+unpickling a private copy, and opening the store does not depend on corpus size.
+"""
+
+import os
+import json
+import mmap
+from collections.abc import Mapping
+
+import numpy as np
+
+
+def _replace(path, write):
+    """Writes through a temp file and swaps it in, so open readers keep the old inode."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class ChunkStore(Mapping):
+    """Read-only mapping of FAISS vector id -> chunk record, backed by mmap."""
+
+    def __init__(self, data_path, offsets_path):
+        self.data_path = data_path
+        self.offsets_path = offsets_path
+        self.table = np.load(offsets_path, mmap_mode="r")
+        self.ids = self.table[:, 0]
+        self.nbytes = os.path.getsize(data_path)
+        self._file = open(data_path, "rb")
+        # mmap refuses empty files; an empty index has nothing to read anyway
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.nbytes else b""
+
+    @staticmethod
+    def write(items, data_path, offsets_path):
+        """Writes (vector_id, record) pairs as a data file and an offset table."""
+        rows = []
+
+        def write_data(f):
+            position = 0
+            for vector_id, record in sorted(items, key=lambda item: item[0]):
+                blob = json.dumps(record, ensure_ascii=False).encode("utf-8")
+                f.write(blob + b"\n")
+                rows.append((vector_id, position, position + len(blob)))
+                position += len(blob) + 1
+
+        _replace(data_path, write_data)
+        table = np.array(rows, dtype="int64").reshape(-1, 3)
+        _replace(offsets_path, lambda f: np.save(f, table))
+
+    def _position(self, vector_id):
+        position = int(np.searchsorted(self.ids, vector_id))
+        if position < len(self.ids) and self.ids[position] == vector_id:
+            return position
+        return None
+
+    def __getitem__(self, vector_id):
+        position = self._position(vector_id)
+        if position is None:
+            raise KeyError(vector_id)
+        _, start, end = self.table[position]
+        return json.loads(self._data[start:end].decode("utf-8"))
+
+    def __contains__(self, vector_id):
+        return self._position(vector_id) is not None
+
+    def __iter__(self):
+        return (int(vector_id) for vector_id in self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def warm(self):
+        """Asks the kernel to read the whole data file into the page cache."""
+        if hasattr(self._data, "madvise") and hasattr(mmap, "MADV_WILLNEED"):
+            self._data.madvise(mmap.MADV_WILLNEED)
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
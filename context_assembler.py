@@ -0,0 +1,126 @@
+"""
+Context Assembler
+Turns retrieved SearchHits into the UNIVERSITY CONTEXT block of the prompt:
+merges overlapping/adjacent chunks from the same file, drops near-duplicates
+and packs the rest by score into a fixed token budget.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from knowledge_base_engine import estimate_tokens
+
+WORD = re.compile(r"\w+")
+
+
+@dataclass
+class Segment:
+    text: str
+    score: float
+    source: str = None
+    start: int = None
+    end: int = None
+    chunk_ids: list = field(default_factory=list)
+
+
+@dataclass
+class AssembledContext:
+    text: str
+    tokens: int
+    raw_tokens: int
+    chunks_in: int
+    segments_used: int
+
+    @property
+    def tokens_saved(self):
+        return max(0, self.raw_tokens - self.tokens)
+
+
+def _shingles(text, size=3):
+    words = WORD.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class ContextAssembler:
+    def __init__(self, token_budget=1800, duplicate_threshold=0.8, max_gap=2):
+        self.token_budget = token_budget
+        self.duplicate_threshold = duplicate_threshold
+        self.max_gap = max_gap
+
+    def merge(self, hits):
+        """Stitches chunks of the same source whose offsets overlap or touch."""
+        segments = []
+        by_source = {}
+        for hit in hits:
+            if hit.source is None or hit.offset is None:
+                segments.append(Segment(hit.text, hit.score, chunk_ids=[hit.chunk_id]))
+            else:
+                by_source.setdefault(hit.source, []).append(hit)
+
+        for source, source_hits in by_source.items():
+            source_hits.sort(key=lambda h: h.offset)
+            current = None
+            for hit in source_hits:
+                end = hit.offset + len(hit.text)
+                if current is not None and hit.offset <= current.end + self.max_gap:
+                    if end > current.end:
+                        overlap = current.end - hit.offset
+                        joiner = "" if overlap >= 0 else "\n"
+                        current.text += joiner + hit.text[max(overlap, 0):]
+                        current.end = end
+                    current.score = max(current.score, hit.score)
+                    current.chunk_ids.append(hit.chunk_id)
+                    continue
+                current = Segment(hit.text, hit.score, source, hit.offset, end, [hit.chunk_id])
+                segments.append(current)
+        return segments
+
+    def deduplicate(self, segments):
+        """Keeps the best-scoring copy of near-identical segments (word-trigram Jaccard)."""
+        kept = []
+        kept_shingles = []
+        for segment in sorted(segments, key=lambda s: s.score, reverse=True):
+            shingles = _shingles(segment.text)
+            if any(
+                len(shingles & other) / (len(shingles | other) or 1) >= self.duplicate_threshold
+                for other in kept_shingles
+            ):
+                continue
+            kept.append(segment)
+            kept_shingles.append(shingles)
+        return kept
+
+    def assemble(self, hits, sections=()):
+        """
+        Builds the context block from hits plus pinned (title, text) sections.
+        Pinned sections (fact tables) are always included and count against the budget.
+        Returns: AssembledContext
+        """
+        raw_tokens = sum(estimate_tokens(hit.text) for hit in hits)
+        parts = []
+        used = 0
+        for title, text in sections:
+            if text:
+                block = f"=== {title} ===\n{text}"
+                parts.append(block)
+                used += estimate_tokens(block)
+                raw_tokens += estimate_tokens(block)
+
+        segments = self.deduplicate(self.merge(hits))
+        chosen = []
+        for segment in segments:
+            tokens = estimate_tokens(segment.text)
+            if used + tokens > self.token_budget:
+                continue
+            chosen.append(segment)
+            used += tokens
+
+        return AssembledContext(
+            text="\n\n".join([s.text for s in chosen] + parts),
+            tokens=used,
+            raw_tokens=raw_tokens,
+            chunks_in=len(hits),
+            segments_used=len(chosen),
+        )
@@ -0,0 +1,83 @@
+"""
+Entity Scanner
+Single-pass extraction of dates, times, emails, phones, URLs, money and
+percentages: every entity regex is folded into one compiled alternation with
+named groups, so a text is traversed once and each match comes back as a
+typed span with offsets. Earlier entries win when two types could match at the
+same position (a URL is not also reported as an email, a date not as a phone).
+"""
+
+import re
+from dataclasses import dataclass
+
+AMOUNT = r"(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?"
+MONTHS = r"(?:january|february|march|april|may|june|july|august|september|october|november|december)"
+
+# (entity type, regex) in priority order; inner groups must be non-capturing
+ENTITY_PATTERNS = [
+    ("urls", r"https?://[^\s]+"),
+    ("emails", r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b"),
+    ("dates", r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b"
+              rf"|\b{MONTHS}\s+\d{{1,2}},?\s+\d{{4}}\b"),
+    ("times", r"\b\d{1,2}:\d{2}(?:\s*(?:am|pm))?\b"),
+    ("phones", r"(?:\+92[-\s]?|\b0)3\d{2}[-\s]?\d{7}\b|\b\d{3}[-.]?\d{3}[-.]?\d{4}\b"),
+    ("percentages", r"\d+(?:\.\d+)?%"),
+    # Money needs a currency marker; bare numbers are not amounts
+    ("money", rf"(?:\$|\b(?:pkr|rs\.?|usd)\s?){AMOUNT}|\b{AMOUNT}\s?(?:pkr|rs|rupees|usd|dollars)\b"),
+]
+
+# The leading lookahead lets the engine skip positions no entity can start at;
+# ASCII keeps \b and \d to cheap byte-class checks
+SCANNER = re.compile(
+    r"(?=[0-9$+a-z])(?:"
+    + "|".join(f"(?P<{name}>{pattern})" for name, pattern in ENTITY_PATTERNS)
+    + ")",
+    re.IGNORECASE | re.ASCII,
+)
+# Every entity contains a digit, "@" (emails) or ":" (URLs)
+CANDIDATE = re.compile(r"[0-9@:]")
+
+
+@dataclass
+class EntitySpan:
+    type: str
+    text: str
+    start: int
+    end: int
+
+
+def scan(text):
+    """Returns: list of EntitySpan in order of appearance."""
+    if not CANDIDATE.search(text):
+        return []
+    return [
+        EntitySpan(match.lastgroup, match.group(), match.start(), match.end())
+        for match in SCANNER.finditer(text)
+    ]
+
+
+def extract(text):
+    """Returns: dict of entity type -> matched strings (types without matches omitted)."""
+    entities = {}
+    if not CANDIDATE.search(text):
+        return entities
+    for match in SCANNER.finditer(text):
+        entities.setdefault(match.lastgroup, []).append(match.group())
+    return entities
+
+
+def extract_batch(texts, processes=None, chunksize=256):
+    """
+    Extracts entities from many texts. With processes > 1 and enough texts
+    (e.g. whole chat logs) the work is spread over a process pool.
+    Returns: list of dicts, one per text
+    """
+    texts = list(texts)
+    if not processes or processes < 2 or len(texts) < chunksize * 2:
+        return [extract(text) for text in texts]
+
+    # Imported here: multiprocessing adds noticeably to module import time
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(extract, texts, chunksize=chunksize))
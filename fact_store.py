@@ -0,0 +1,257 @@
+"""
+Structured Fact Store
+Parses the numbered faculty directory and the fee tables into indexed
+in-memory rows so count/list/lookup questions can be answered or tightly
+filtered locally instead of pasting whole files into the prompt.
+"""
+
+import os
+import re
+import json
+from collections import Counter, defaultdict
+
+FACULTY_FILE = "iqra_faculty_directory.txt"
+FEES_FILE = "iqra_fees_2026.txt"
+
+FACULTY_LINE = re.compile(r"^\s*(\d+)\.\s+(.+?)\s+\(([^()]+)\)\s+-\s+(.+?)\s*$")
+FEE_LINE = re.compile(r"^\s*-\s+(.+?):\s+~?PKR\s+([\d,]+)(.*)$")
+WORD = re.compile(r"[a-z0-9&]+")
+
+NAME_TITLES = {"dr", "engr", "mr", "ms", "mrs", "prof", "syed", "muhammad", "m", "urf"}
+
+# Canonical designation -> spellings used in the directory and in questions
+DESIGNATIONS = {
+    "Assistant Professor": ["asst. professor", "assistant professor", "asst professor"],
+    "Junior Lecturer": ["junior lecturer", "jr. lecturer", "jr lecturer"],
+    "Senior Lecturer": ["sr. lecturer", "senior lecturer", "sr lecturer"],
+    "Program Incharge": ["program incharge", "incharge"],
+    "Lecturer": ["lecturer"],
+    "Professor": ["professor"],
+    "Faculty": ["faculty"],
+}
+
+# Fee section keywords -> aliases a student might type
+FEE_PROGRAMS = {
+    "UNDERGRADUATE": ["bs", "bscs", "bs cs", "bba", "undergraduate", "undergrad", "bachelor"],
+    "GRADUATE": ["ms", "mphil", "phd", "graduate", "postgraduate", "masters"],
+}
+
+# "how many / number of / count of" followed within a few words by a teacher noun;
+# "faculty of engineering" is a school, not its teachers
+COUNT_QUESTION = re.compile(
+    r"\b(?:how many|number of|count of|kitne|kitnay)\s+(?:[a-z&.'-]+\s+){0,3}?"
+    r"(?:teachers?|lecturers?|professors?|instructors?|ustad|faculty(?!\s+of\b)(?:\s+members?)?)\b"
+)
+# Questions about fees or students are not headcounts, even when they mention teachers
+NOT_COUNT_WORDS = ["fee", "cost", "tuition", "charge", "price", "salary", "pkr", "rupee", "student"]
+LIST_WORDS = ["list", "all", "names", "every"]
+FACULTY_WORDS = ["teacher", "faculty", "staff", "lecturer", "professor", "instructor", "ustad"]
+
+
+def _normalize_designation(raw):
+    lowered = raw.lower()
+    for canonical, spellings in DESIGNATIONS.items():
+        if any(lowered.startswith(s) for s in spellings):
+            return canonical
+    return raw.strip()
+
+
+def _contains_phrase(text, phrase):
+    """Whole-word match that also accepts a plural "s" ("lecturers")."""
+    return re.search(rf"(?<![a-z0-9]){re.escape(phrase)}s?(?![a-z0-9])", text) is not None
+
+
+class FactStore:
+    def __init__(self):
+        self.faculty = []
+        self.fees = []
+        self._by_name = defaultdict(set)
+        self._by_designation = defaultdict(set)
+        self._by_course = defaultdict(set)
+        self._by_program = defaultdict(set)
+
+    # ------------------------------------------------------------------ build
+    def build(self, directory_path="knowledge_base"):
+        """Parses the faculty directory and fee file found in the directory. Returns: self"""
+        self.faculty = []
+        self.fees = []
+
+        faculty_path = os.path.join(directory_path, FACULTY_FILE)
+        if os.path.exists(faculty_path):
+            with open(faculty_path, "r", encoding="utf-8") as f:
+                self.faculty = self.parse_faculty(f.read())
+
+        fees_path = os.path.join(directory_path, FEES_FILE)
+        if os.path.exists(fees_path):
+            with open(fees_path, "r", encoding="utf-8") as f:
+                self.fees = self.parse_fees(f.read())
+
+        self._reindex()
+        return self
+
+    @staticmethod
+    def parse_faculty(text):
+        rows = []
+        for line in text.splitlines():
+            match = FACULTY_LINE.match(line)
+            if not match:
+                continue
+            number, name, designation, courses = match.groups()
+            rows.append({
+                "number": int(number),
+                "name": name.strip(),
+                "designation": _normalize_designation(designation),
+                "designation_raw": designation.strip(),
+                "courses": [c.strip() for c in courses.split(",") if c.strip()],
+            })
+        return rows
+
+    @staticmethod
+    def parse_fees(text):
+        rows = []
+        section = "GENERAL"
+        for line in text.splitlines():
+            stripped = line.strip()
+            if stripped.endswith(":") and stripped == stripped.upper() and not stripped.startswith("-"):
+                section = stripped.rstrip(":")
+                continue
+            match = FEE_LINE.match(line)
+            if not match:
+                continue
+            label, amount, note = match.groups()
+            rows.append({
+                "section": section,
+                "label": label.strip(),
+                "amount": int(amount.replace(",", "")),
+                "note": note.strip(" .()"),
+            })
+        return rows
+
+    def _reindex(self):
+        self._by_name.clear()
+        self._by_designation.clear()
+        self._by_course.clear()
+        self._by_program.clear()
+
+        for i, row in enumerate(self.faculty):
+            for token in WORD.findall(row["name"].lower()):
+                if token not in NAME_TITLES and len(token) > 2:
+                    self._by_name[token].add(i)
+            self._by_designation[row["designation"]].add(i)
+            for course in row["courses"]:
+                self._by_course[course.lower()].add(i)
+
+        for i, row in enumerate(self.fees):
+            for program in FEE_PROGRAMS:
+                if row["section"].startswith(program):
+                    self._by_program[program].add(i)
+
+    # ---------------------------------------------------------- persistence
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"faculty": self.faculty, "fees": self.fees}, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        store = cls()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        store.faculty = data.get("faculty", [])
+        store.fees = data.get("fees", [])
+        store._reindex()
+        return store
+
+    # -------------------------------------------------------------- queries
+    def match_faculty(self, query):
+        """
+        Filters faculty rows by names, designations and courses mentioned in the query.
+        Returns: (rows, matched_any_filter)
+        """
+        text = query.lower()
+        selected = None
+
+        def narrow(ids):
+            nonlocal selected
+            selected = set(ids) if selected is None else selected & ids
+
+        for canonical, spellings in DESIGNATIONS.items():
+            if canonical == "Faculty":
+                continue
+            if any(_contains_phrase(text, s) for s in spellings):
+                ids = set()
+                for designation, members in self._by_designation.items():
+                    if canonical.lower() in designation.lower():
+                        ids |= members
+                narrow(ids)
+                break
+
+        course_ids = set()
+        for course, members in self._by_course.items():
+            if len(course) > 2 and _contains_phrase(text, course):
+                course_ids |= members
+        if course_ids:
+            narrow(course_ids)
+
+        # Prefer the rows sharing the most name tokens ("Shahzad Karim" over "Shahzad Ahmed")
+        name_hits = Counter()
+        for token in set(WORD.findall(text)):
+            name_hits.update(self._by_name.get(token, ()))
+        if name_hits and not course_ids:
+            best = max(name_hits.values())
+            narrow({i for i, hits in name_hits.items() if hits == best})
+
+        if selected is None:
+            return list(self.faculty), False
+        return [self.faculty[i] for i in sorted(selected)], True
+
+    def answer_count(self, query):
+        """Answers "how many teachers/lecturers..." locally. Returns: answer string or None"""
+        text = query.lower()
+        if not self.faculty:
+            return None
+        if not COUNT_QUESTION.search(text) or any(w in text for w in NOT_COUNT_WORDS):
+            return None
+
+        rows, filtered = self.match_faculty(query)
+        if filtered and not rows:
+            # Filters matched nobody: let retrieval answer rather than claim zero
+            return None
+        if filtered:
+            return f"According to the faculty directory, {len(rows)} faculty members match your query."
+
+        breakdown = Counter(row["designation"] for row in rows)
+        details = ", ".join(f"{count} {designation}" for designation, count in breakdown.most_common())
+        return f"According to the faculty directory, there are {len(rows)} faculty members in FEST & CS ({details})."
+
+    def faculty_context(self, query):
+        """Compact faculty rows relevant to the query, or "" when nothing specific matched."""
+        text = query.lower()
+        rows, filtered = self.match_faculty(query)
+        wants_list = any(w in text for w in LIST_WORDS) and any(w in text for w in FACULTY_WORDS)
+        if not filtered and not wants_list:
+            return ""
+        return "\n".join(
+            f"{row['number']}. {row['name']} ({row['designation_raw']}) - {', '.join(row['courses'])}"
+            for row in rows
+        )
+
+    def fee_context(self, query):
+        """General fee components plus rows for programs mentioned in the query."""
+        text = query.lower()
+        if not self.fees or not any(w in text for w in ["fee", "fees", "cost", "tuition", "charges", "kitni"]):
+            return ""
+
+        ids = set()
+        for program, aliases in FEE_PROGRAMS.items():
+            if any(_contains_phrase(text, alias) for alias in aliases):
+                ids |= self._by_program[program]
+        if not ids:
+            ids = set(range(len(self.fees)))
+        else:
+            ids |= {i for i, row in enumerate(self.fees) if not any(row["section"].startswith(p) for p in FEE_PROGRAMS)}
+
+        return "\n".join(
+            f"- {row['section']} | {row['label']}: PKR {row['amount']:,}"
+            + (f" ({row['note']})" if row["note"] else "")
+            for row in (self.fees[i] for i in sorted(ids))
+        )
@@ -0,0 +1,154 @@
+"""
+Fast Path Router
+Answers small talk (greetings, thanks, goodbyes) and questions about the bot
+itself from a reply table, in front of the answer cache, retrieval and Groq.
+
+A message is served locally only when AdvancedNLPEngine.detect_intent's best
+intent is one of the trivial ones, no content intent (fee, exam, question,
+help, ...) scores at all, the message is short and every word in it is
+small talk (intent keywords match inside words: "hi" in "something"). "hi" is
+answered locally; "hi, what is the fee?" still goes to retrieval.
+
+Replies (including the fixed answers about the model and its creator) are
+templates ({assistant}, {university}); FAST_PATH_REPLIES can point
+to a JSON file of {intent: [templates]} that overrides the defaults.
+"""
+
+import os
+import re
+import json
+import random
+import threading
+
+from advanced_nlp_engine import AdvancedNLPEngine
+
+TRIVIAL_INTENTS = ("greeting", "farewell", "appreciation")
+
+# Words that may surround a greeting / thanks besides the intent keywords themselves
+FILLER_WORDS = frozenset([
+    "a", "alaikum", "alaikom", "all", "and", "again", "bhai", "bot", "dear", "everyone", "for",
+    "friend", "jazakallah", "lot", "much", "o", "ok", "okay", "so", "sir", "madam", "the", "there",
+    "u", "very", "wa", "walaikum", "you", "your", "ya", "yaar",
+])
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+# Questions about the bot itself: (name, trigger phrases), matched as substrings
+RULES = [
+    ("model_info", ["which llm", "what llm", "what model"]),
+    ("creator", [
+        "who made you", "who created you", "who designed you", "who developed you",
+        "creator", "developer", "designer", "makers", "developers",
+        "kis ne banaya", "kisne banaya", "tumhe kisne banaya", "owner"
+    ]),
+]
+
+DEFAULT_REPLIES = {
+    "model_info": ["I am powered by Llama 3.1 8B via Groq ultra-fast inference engine."],
+    "creator": ["I was created by Iqra University team Sajjad Baloch to serve as a conversational AI assistant for students."],
+    "greeting": [
+        "Hello! I'm {assistant}, the {university} assistant. How can I help you today?",
+        "Hi there! Ask me anything about admissions, fees, faculty or campus life at {university}.",
+    ],
+    "appreciation": [
+        "You're welcome! Let me know if there's anything else I can help with.",
+        "Glad I could help! Feel free to ask anything else about {university}.",
+    ],
+    "farewell": [
+        "Goodbye! Best of luck with your studies at {university}.",
+        "Take care! Come back anytime you have questions about {university}.",
+    ],
+}
+
+
+class FastPathRouter:
+    def __init__(
+        self,
+        nlp=None,
+        replies=None,
+        min_confidence=0.2,
+        max_words=5,
+        assistant="NEURA",
+        university="Iqra University",
+    ):
+        self.nlp = nlp or AdvancedNLPEngine()
+        self.min_confidence = min_confidence
+        self.max_words = max_words
+        self.fields = {"assistant": assistant, "university": university}
+        self.vocabulary = set(FILLER_WORDS) | {assistant.lower()}
+        for intent in TRIVIAL_INTENTS:
+            for keyword in self.nlp.intent_patterns.get(intent, {}).get("keywords", []):
+                self.vocabulary.update(keyword.split())
+        self.replies = {intent: list(templates) for intent, templates in DEFAULT_REPLIES.items()}
+        for intent, templates in (replies or {}).items():
+            self.replies[intent] = [templates] if isinstance(templates, str) else list(templates)
+
+        self.requests = 0
+        self.served = {}  # intent or rule name -> count
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, nlp=None):
+        """Builds a router from FAST_PATH_* environment variables."""
+        replies = None
+        replies_path = os.getenv("FAST_PATH_REPLIES")
+        if replies_path:
+            with open(replies_path, "r", encoding="utf-8") as f:
+                replies = json.load(f)
+        return cls(
+            nlp=nlp,
+            replies=replies,
+            min_confidence=float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.2")),
+            max_words=int(os.getenv("FAST_PATH_MAX_WORDS", "5")),
+        )
+
+    def classify(self, text):
+        """
+        Decides whether a message can be answered from the reply table.
+        Returns: intent or rule name, or None when it needs the full pipeline
+        """
+        text_lower = text.lower()
+        for name, phrases in RULES:
+            if any(phrase in text_lower for phrase in phrases):
+                return name
+
+        if len(text.split()) > self.max_words:
+            return None
+        # "tell me something" contains "hi" but is not a greeting
+        words = WORD_PATTERN.findall(text_lower)
+        if not all(word in self.vocabulary or word.rstrip("s") in self.vocabulary for word in words):
+            return None
+        intent, confidence = self.nlp.detect_intent(text)
+        if intent not in TRIVIAL_INTENTS or confidence < self.min_confidence:
+            return None
+        # Any content intent ("hi, what is the fee?") means there is a real question
+        scores = self.nlp.intent_matcher.scores(text_lower)
+        for name, score in zip(self.nlp.intent_matcher.intents, scores):
+            if score and name not in TRIVIAL_INTENTS:
+                return None
+        return intent
+
+    def reply(self, name):
+        return random.choice(self.replies[name]).format(**self.fields)
+
+    def route(self, text):
+        """Returns: (intent or rule name, reply) for messages served locally, else None"""
+        name = self.classify(text)
+        with self._lock:
+            self.requests += 1
+            if name is not None:
+                self.served[name] = self.served.get(name, 0) + 1
+        if name is None:
+            return None
+        return name, self.reply(name)
+
+    def stats(self):
+        with self._lock:
+            served = dict(self.served)
+            requests = self.requests
+        total_served = sum(served.values())
+        return {
+            "requests": requests,
+            "served_locally": total_served,
+            "local_fraction": round(total_served / requests, 4) if requests else 0.0,
+            "by_intent": served,
+        }
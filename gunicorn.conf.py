@@ -0,0 +1,17 @@
+"""
+Gunicorn settings, picked up automatically by `gunicorn app:app`.
+With KB_PRELOAD=1 (default) the app, encoder and mmapped index are loaded in
+the master before workers fork, so workers start instantly and share those
+pages copy-on-write instead of each loading a private copy.
+"""
+
+import os
+
+preload_app = os.getenv("KB_PRELOAD", "1") == "1"
+
+
+def when_ready(server):
+    if preload_app:
+        from model_registry import registry
+        registry.warm()
+        server.log.info("Knowledge base preloaded before fork")
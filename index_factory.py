@@ -0,0 +1,181 @@
+"""
+Index Factory
+Builds the FAISS index behind KnowledgeBaseEngine from a short type name, so
+each deployment can trade recall for memory and speed:
+
+- flat:     exact brute force, full float32 vectors (default)
+- hnsw:     graph index, fast queries, no deletes (a sync rebuilds instead)
+- ivf_flat: inverted lists over full vectors, searches nprobe lists
+- ivf_sq8:  inverted lists over 8-bit scalar-quantized vectors (~4x smaller)
+- ivf_pq:   inverted lists over product-quantized codes (~32x smaller)
+- sq8:      brute force over 8-bit scalar-quantized vectors
+
+Trainable types are trained on the embeddings of the ingest that creates them;
+corpora too small to train on fall back to flat until the next full rebuild.
+evaluate() reports recall@k against flat, latency and size for each type.
+"""
+
+import math
+import time
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = {
+    "flat": "IDMap,Flat",
+    "hnsw": "IDMap,HNSW{hnsw_m}",
+    "ivf_flat": "IVF{nlist},Flat",
+    "ivf_sq8": "IVF{nlist},SQ8",
+    "ivf_pq": "IVF{nlist},PQ{pq_m}",
+    "sq8": "IDMap,SQ8",
+}
+
+DEFAULT_PARAMS = {
+    "hnsw_m": 32,
+    "ef_construction": 80,
+    "ef_search": 64,
+    "nprobe": 16,
+}
+
+# k-means wants ~39 points per centroid; PQ trains 256 centroids per sub-quantizer
+POINTS_PER_CENTROID = 39
+PQ_CENTROIDS = 256
+
+# Types that must be trained before vectors can be added, and how many
+# vectors a streaming ingest collects to train them on
+TRAINABLE_TYPES = {"ivf_flat", "ivf_sq8", "ivf_pq", "sq8"}
+TRAINING_SAMPLE = 50000
+
+
+def _nlist(count):
+    return max(1, min(int(4 * math.sqrt(count)), count // POINTS_PER_CENTROID))
+
+
+def _pq_m(dimension):
+    """Largest divisor of the dimension giving sub-vectors of at least 8 floats."""
+    return next(m for m in range(max(1, dimension // 8), 0, -1) if dimension % m == 0)
+
+
+def describe(index_type, dimension, count, params=None):
+    """
+    Resolves an index type to a faiss.index_factory string for this corpus size.
+    Returns: (description, minimum number of training vectors)
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}'. Choose from: {', '.join(INDEX_TYPES)}")
+    settings = dict(DEFAULT_PARAMS, **(params or {}))
+    settings.setdefault("nlist", _nlist(count))
+    settings.setdefault("pq_m", _pq_m(dimension))
+
+    minimum = 0
+    if index_type.startswith("ivf"):
+        minimum = settings["nlist"]
+    if index_type == "ivf_pq":
+        minimum = max(minimum, PQ_CENTROIDS)
+    return INDEX_TYPES[index_type].format(**settings), minimum
+
+
+def apply_search_params(index, params=None):
+    """Sets query-time knobs (nprobe for IVF, efSearch for HNSW) where the index has them."""
+    settings = dict(DEFAULT_PARAMS, **(params or {}))
+    space = faiss.ParameterSpace()
+    for name, key in (("nprobe", "nprobe"), ("efSearch", "ef_search")):
+        try:
+            space.set_index_parameter(index, name, settings[key])
+        except RuntimeError:
+            pass  # parameter does not apply to this index type
+
+
+def build_index(index_type, vectors, dimension, params=None):
+    """
+    Creates and trains an empty index of the given type on the vectors (not added).
+    Returns: (index, description, type actually built: "flat" when there were
+             too few vectors to train the requested type)
+    """
+    description, minimum = describe(index_type, dimension, len(vectors), params)
+    if minimum and len(vectors) < minimum:
+        print(f"Only {len(vectors)} vectors, {index_type} needs {minimum} to train; using flat for now.")
+        index_type = "flat"
+        description = INDEX_TYPES["flat"]
+
+    index = faiss.index_factory(dimension, description)
+    hnsw = _hnsw(index)
+    if hnsw is not None:
+        hnsw.efConstruction = dict(DEFAULT_PARAMS, **(params or {}))["ef_construction"]
+    if not index.is_trained:
+        index.train(np.ascontiguousarray(vectors, dtype="float32"))
+    apply_search_params(index, params)
+    return index, description, index_type
+
+
+def _hnsw(index):
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    return inner.hnsw if hasattr(inner, "hnsw") else None
+
+
+def supports_remove(index):
+    """HNSW graphs cannot delete vectors; every other type here can."""
+    return _hnsw(index) is None
+
+
+def selector_params(index, vector_ids, exhaustive=True):
+    """
+    Search parameters restricting a search to vector_ids. Exhaustive searches
+    probe every IVF list (exact distances for specific ids); otherwise the
+    index's own nprobe is kept (shard-restricted top-k searches).
+    """
+    selector = faiss.IDSelectorBatch(np.array(vector_ids, dtype="int64"))
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nlist if exhaustive else ivf.nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+
+def index_bytes(index):
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def evaluate(vectors, queries, index_types=None, top_k=5, params=None):
+    """
+    Builds each index type on the vectors and compares it with exact search.
+    Returns: list of dicts (type, description, build_seconds, bytes, recall_at_k,
+             latency_p50_ms, latency_p95_ms)
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    queries = np.ascontiguousarray(queries, dtype="float32")
+    ids = np.arange(len(vectors), dtype="int64")
+    dimension = vectors.shape[1]
+
+    exact = faiss.IndexFlatL2(dimension)
+    exact.add(vectors)
+    _, truth = exact.search(queries, top_k)
+
+    results = []
+    for index_type in index_types or list(INDEX_TYPES):
+        start = time.perf_counter()
+        index, description, _ = build_index(index_type, vectors, dimension, params)
+        index.add_with_ids(vectors, ids)
+        build_seconds = time.perf_counter() - start
+
+        latencies = []
+        found = 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            _, labels = index.search(query.reshape(1, -1), top_k)
+            latencies.append(time.perf_counter() - start)
+            found += len(set(labels[0]) & set(expected))
+        latencies.sort()
+
+        results.append({
+            "type": index_type,
+            "description": description,
+            "build_seconds": round(build_seconds, 3),
+            "bytes": index_bytes(index),
+            f"recall_at_{top_k}": round(found / (len(queries) * top_k), 4),
+            "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 4),
+            "latency_p95_ms": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000, 4),
+        })
+    return results
@@ -0,0 +1,75 @@
+"""
+Ingest Pipeline
+Streaming stages used by KnowledgeBaseEngine.ingest_directory:
+
+    hash files (block by block) -> chunk (process pool) -> encode (fixed batches) -> add to index
+
+Files are chunked in worker processes with a bounded number in flight while
+the main process encodes the previous batch, so syncing thousands of files
+never holds the raw corpus or all embeddings in memory at once.
+"""
+
+import os
+import hashlib
+from collections import deque
+
+CHUNK_SIZE = 600
+CHUNK_OVERLAP = 50
+
+_splitter = None
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file's text, read block by block (same value as hashing the whole text)."""
+    digest = hashlib.sha256()
+    with open(path, "r", encoding="utf-8") as f:
+        for block in iter(lambda: f.read(block_size), ""):
+            digest.update(block.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def chunk_file(path):
+    """
+    Splits one file, remembering where each chunk starts (runs in worker processes).
+    Returns: (sha256 of the text that was split, list of (chunk text, start offset))
+    """
+    global _splitter
+    if _splitter is None:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        _splitter = RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    chunks = _splitter.create_documents([text])
+    return digest, [(chunk.page_content, chunk.metadata["start_index"]) for chunk in chunks]
+
+
+def iter_chunked(paths, workers=None, max_pending=None):
+    """
+    Yields (path, sha256, chunks) in input order. With more than one worker the
+    files are split in a process pool; at most max_pending files are queued or
+    finished-but-unconsumed at any time.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(paths) < 2:
+        for path in paths:
+            yield (path,) + chunk_file(path)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    max_pending = max_pending or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append((path, pool.submit(chunk_file, path)))
+            if len(pending) >= max_pending:
+                done_path, future = pending.popleft()
+                yield (done_path,) + future.result()
+        while pending:
+            done_path, future = pending.popleft()
+            yield (done_path,) + future.result()
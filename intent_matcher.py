@@ -0,0 +1,203 @@
+"""
+Intent Matcher
+Compiles AdvancedNLPEngine's intent table (keywords + regex patterns) into one
+Aho-Corasick automaton, so every intent is scored in a single pass over the
+text instead of one substring check / re.search per keyword and pattern.
+
+Patterns made of literals, word boundaries, ^/$ anchors, (a|b) groups and
+optional characters ("mid ?term") are expanded into anchored literals and
+matched by the automaton. Anything more complex falls back to a precompiled
+regex. Scores are identical to the original loop: 2 per keyword, 3 per pattern.
+"""
+
+import re
+from collections import deque
+
+KEYWORD_WEIGHT = 2
+PATTERN_WEIGHT = 3
+MAX_EXPANSIONS = 64
+
+
+def _is_word(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def _expand(pattern):
+    """
+    Expands a simple regex into the literal strings it matches.
+    Returns: (literals, left_boundary, right_boundary), or None if the pattern
+    uses syntax the automaton cannot represent exactly.
+    """
+    literals = [""]
+    left_boundary = right_boundary = False
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if pattern.startswith("\\b", i):
+            if i == 0:
+                left_boundary = True
+            elif i + 2 == len(pattern):
+                right_boundary = True
+            else:
+                return None
+            i += 2
+            continue
+        if ch == "\\" and i + 1 < len(pattern):
+            if pattern[i + 1].isalnum():
+                return None  # \d, \w, \s ... are character classes
+            pieces = [pattern[i + 1]]
+            i += 2
+        elif ch == "(":
+            end = pattern.find(")", i)
+            body = pattern[i + 1:end]
+            if end == -1 or body.startswith("?") or "(" in body:
+                return None
+            pieces = []
+            for alternative in body.split("|"):
+                expanded = _expand(alternative)
+                if expanded is None or expanded[1] or expanded[2]:
+                    return None
+                pieces.extend(expanded[0])
+            i = end + 1
+        elif ch in ".[]{}*+?|^$)":
+            return None
+        else:
+            pieces = [ch]
+            i += 1
+
+        optional = pattern.startswith("?", i)
+        if optional:
+            i += 1
+        if i < len(pattern) and pattern[i] in "*+{":
+            return None
+        literals = [text + piece for text in literals for piece in pieces] + (literals if optional else [])
+        if len(literals) > MAX_EXPANSIONS:
+            return None
+
+    return [text for text in literals if text], left_boundary, right_boundary
+
+
+class _Feature:
+    __slots__ = ("intent", "weight", "left", "right", "start", "end")
+
+    def __init__(self, intent, weight, left=False, right=False, start=False, end=False):
+        self.intent = intent
+        self.weight = weight
+        self.left = left
+        self.right = right
+        self.start = start
+        self.end = end
+
+
+class IntentMatcher:
+    def __init__(self, intent_patterns):
+        self.intents = list(intent_patterns)
+        intent_ids = {intent: i for i, intent in enumerate(self.intents)}
+
+        self.feature_count = 0
+        literal_features = {}   # literal -> [(feature_id, _Feature)]
+        self.regex_features = []  # (intent_id, weight, compiled pattern)
+
+        def add_literal(literal, feature):
+            literal_features.setdefault(literal, []).append((self.feature_count, feature))
+
+        for intent, data in intent_patterns.items():
+            intent_id = intent_ids[intent]
+            for keyword in data.get("keywords", []):
+                add_literal(keyword, _Feature(intent_id, KEYWORD_WEIGHT))
+                self.feature_count += 1
+
+            for pattern in data.get("patterns", []):
+                body, start, end = pattern, False, False
+                if body.startswith("^"):
+                    body, start = body[1:], True
+                if body.endswith("$") and not body.endswith("\\$"):
+                    body, end = body[:-1], True
+                expanded = _expand(body)
+                if expanded and expanded[0]:
+                    literals, left, right = expanded
+                    feature = _Feature(intent_id, PATTERN_WEIGHT, left, right, start, end)
+                    for literal in literals:
+                        add_literal(literal, feature)
+                else:
+                    self.regex_features.append((intent_id, PATTERN_WEIGHT, re.compile(pattern)))
+                self.feature_count += 1
+
+        self._build(literal_features)
+
+    def _build(self, literal_features):
+        """Builds the trie, failure links and a full transition table (a DFA)."""
+        goto = [{}]
+        outputs = [[]]
+        for literal, features in literal_features.items():
+            state = 0
+            for ch in literal:
+                if ch not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            outputs[state].extend((len(literal), feature_id, feature) for feature_id, feature in features)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        order = []
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for ch, child in goto[state].items():
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(ch, 0)
+                outputs[child] = outputs[child] + outputs[fail[child]]
+
+        # Resolve failure links ahead of time: each state maps every known char directly
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        for state in order:
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+        self._delta = delta
+        self._outputs = outputs
+
+    def scores(self, text_lower):
+        """Returns: list of scores aligned with self.intents."""
+        scores = [0] * len(self.intents)
+        matched = set()
+        delta = self._delta
+        outputs = self._outputs
+        length = len(text_lower)
+        state = 0
+        for position, ch in enumerate(text_lower):
+            state = delta[state].get(ch, 0)
+            if not outputs[state]:
+                continue
+            end = position + 1
+            for size, feature_id, feature in outputs[state]:
+                if feature_id in matched:
+                    continue
+                begin = end - size
+                if feature.start and begin != 0:
+                    continue
+                if feature.end and not (end == length or (end == length - 1 and text_lower[-1] == "\n")):
+                    continue
+                if feature.left and (begin > 0 and _is_word(text_lower[begin - 1])) == _is_word(text_lower[begin]):
+                    continue
+                if feature.right and (end < length and _is_word(text_lower[end])) == _is_word(text_lower[end - 1]):
+                    continue
+                matched.add(feature_id)
+                scores[feature.intent] += feature.weight
+
+        for intent_id, weight, regex in self.regex_features:
+            if regex.search(text_lower):
+                scores[intent_id] += weight
+        return scores
+
+    def best(self, text_lower):
+        """Returns: (intent, score) of the highest-scoring intent (first wins ties), or (None, 0)."""
+        scores = self.scores(text_lower)
+        best_id = max(range(len(scores)), key=scores.__getitem__, default=None)
+        if best_id is None or scores[best_id] <= 0:
+            return None, 0
+        return self.intents[best_id], scores[best_id]
@@ -1,9 +1,50 @@
 import os
+import json
+import hashlib
 import faiss
 import numpy as np
 import pickle
-from sentence_transformers import SentenceTransformer
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from dataclasses import dataclass
+from tqdm import tqdm
+from query_cache import QueryEmbeddingCache
+from bm25_index import BM25Index
+from fact_store import FactStore
+from chunk_store import ChunkStore
+import index_factory
+import ingest_pipeline
+import shard_router
+from model_registry import registry
+
+
+def estimate_tokens(text):
+    """Fast local token estimate (~4 characters per token for English text)."""
+    return max(1, len(text) // 4)
+
+
+# Zero-copy mapping of the flat vectors (IFC) where FAISS supports it
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+# Share of a query's IDF weight a chunk must contain to survive max_distance on lexical grounds
+LEXICAL_COVERAGE = 0.4
+
+
+@dataclass
+class SearchHit:
+    """A single retrieved chunk with its FAISS distance (lower is closer)."""
+    chunk_id: int
+    text: str
+    distance: float
+    source: str = None
+    offset: int = None
+    bm25: float = 0.0
+    fused: float = None
+
+    @property
+    def score(self):
+        """Relevance, higher is better: the hybrid score when fused, else dense similarity in (0, 1]."""
+        if self.fused is not None:
+            return self.fused
+        return 1.0 / (1.0 + self.distance)
 
 
 class KnowledgeBaseEngine:
@@ -12,91 +53,545 @@ class KnowledgeBaseEngine:
         model_name="all-MiniLM-L6-v2",
         db_path="iqra_brain.index",
         metadata_path="iqra_metadata.pkl",
+        manifest_path="iqra_manifest.json",
+        bm25_path="iqra_bm25.npz",
+        facts_path="iqra_facts.json",
+        chunks_path="iqra_chunks.jsonl",
+        chunk_offsets_path="iqra_chunks.idx.npy",
+        use_mmap=None,
+        index_type=None,
+        index_params=None,
+        query_cache_size=1024,
+        query_cache_ttl=3600,
+        hybrid=True,
+        hybrid_alpha=0.5,
+        shards=None,
     ):
-        # Force CPU (required for Streamlit Cloud)
-        self.model = SentenceTransformer(model_name, device="cpu")
+        # Repeated questions reuse their embedding instead of re-encoding
+        self.query_cache = QueryEmbeddingCache(
+            max_size=query_cache_size, ttl_seconds=query_cache_ttl
+        )
+        self.set_model(model_name)
 
         self.db_path = db_path
         self.metadata_path = metadata_path
+        self.manifest_path = manifest_path
+        self.bm25_path = bm25_path
+        self.facts_path = facts_path
+        self.chunks_path = chunks_path
+        self.chunk_offsets_path = chunk_offsets_path
+        # Open vectors and chunk text as shared read-only mmaps (KB_MMAP=0 loads private copies)
+        if use_mmap is None:
+            use_mmap = os.getenv("KB_MMAP", "1") == "1"
+        self.use_mmap = use_mmap
+        self.mmapped = False
+        # FAISS index kind (see index_factory.INDEX_TYPES); KB_NPROBE / KB_EF_SEARCH tune queries
+        self.index_type = index_type or os.getenv("KB_INDEX_TYPE", "flat")
+        if self.index_type not in index_factory.INDEX_TYPES:
+            raise ValueError(
+                f"Unknown index type '{self.index_type}'. Choose from: {', '.join(index_factory.INDEX_TYPES)}"
+            )
+        self.index_params = dict(index_params or {})
+        for key, env in (("nprobe", "KB_NPROBE"), ("ef_search", "KB_EF_SEARCH")):
+            if os.getenv(env):
+                self.index_params.setdefault(key, int(os.getenv(env)))
         self.index = None
-        self.metadata = []
+        # Chunk records (text, source, offset, chunk_id) keyed by FAISS vector id;
+        # a ChunkStore when mmapped, a dict while a sync is editing it
+        self.metadata = {}
+        # Per-file content hashes and the vector ids each file owns
+        self.manifest = self._empty_manifest()
+        self.version = None
+        # Lexical index fused with FAISS scores (alpha weights the dense side)
+        self.bm25 = BM25Index()
+        self.hybrid = hybrid
+        self.hybrid_alpha = hybrid_alpha
+        # Logical domain shards (name -> filename patterns) searched through an ID
+        # selector; KB_SHARDS=0 disables them
+        if shards is None:
+            shards = shard_router.DEFAULT_SHARDS if os.getenv("KB_SHARDS", "1") == "1" else {}
+        self.shards = dict(shards)
+        self.shard_router = None
+        self.shard_fallbacks = 0
+        self._shard_filters = {}
+        self._shard_filters_version = None
+        # Parsed faculty and fee tables for local count/list/lookup answers
+        self.facts = FactStore()
+        if os.path.exists(self.facts_path):
+            self.facts = FactStore.load(self.facts_path)
 
         # Load existing index if available
-        if os.path.exists(self.db_path) and os.path.exists(self.metadata_path):
+        if os.path.exists(self.db_path) and (
+            self._has_chunk_store() or os.path.exists(self.metadata_path)
+        ):
             self.load_index()
+        self._update_version()
+
+    def set_model(self, model_name):
+        """Attaches the shared sentence encoder and invalidates cached query vectors."""
+        self.model_name = model_name
+        self.model = registry.get_encoder(model_name)
+        self.query_cache.bind_model(model_name)
+
+    def _empty_manifest(self):
+        return {"model_name": self.model_name, "index_type": self.index_type, "next_id": 0, "files": {}}
+
+    def _update_version(self):
+        """Fingerprints the indexed content; changes whenever a sync modifies the index."""
+        files = self.manifest.get("files", {})
+        if files:
+            fingerprint = "|".join(
+                f"{name}:{entry['sha256']}" for name, entry in sorted(files.items())
+            )
+        else:
+            fingerprint = f"legacy:{self.index.ntotal if self.index is not None else 0}"
+        self.version = hashlib.sha256(
+            f"{self.model_name}|{self.index_type}|{fingerprint}".encode("utf-8")
+        ).hexdigest()[:16]
+
+    def _rebuild_bm25(self):
+        self.bm25 = BM25Index().build(
+            (vector_id, record["text"]) for vector_id, record in sorted(self.metadata.items())
+        )
+
+    def _is_incremental(self):
+        """True when the loaded index can be updated in place."""
+        return (
+            self.index is not None
+            and self.manifest.get("index_type", "flat") == self.index_type
+            and self.manifest.get("model_name") == self.model_name
+            and bool(self.manifest.get("files"))
+        )
+
+    def _reset_index(self):
+        # The index itself is created once the embeddings to train it on exist
+        self.index = None
+        self.metadata = {}
+        self.manifest = self._empty_manifest()
+        self.mmapped = False
+
+    def _has_chunk_store(self):
+        return os.path.exists(self.chunks_path) and os.path.exists(self.chunk_offsets_path)
 
-    def ingest_directory(self, directory_path="knowledge_base"):
-        """Reads all .txt files from the directory and adds them to the index."""
-        documents = []
+    def _make_writable(self):
+        """mmapped index and chunk store are read-only views; load private copies before a sync edits them."""
+        if not self.mmapped:
+            return
+        self.index = faiss.read_index(self.db_path)
+        index_factory.apply_search_params(self.index, self.index_params)
+        store = self.metadata
+        self.metadata = dict(store.items())
+        if isinstance(store, ChunkStore):
+            store.close()
+        self.mmapped = False
+
+    def ingest_directory(
+        self, directory_path="knowledge_base", force=False, workers=None, batch_size=256, checkpoint_every=20000
+    ):
+        """
+        Syncs the index with the .txt files in the directory.
+        Only added or changed files are embedded; vectors of deleted files are removed.
+        Files stream through hash -> chunk (process pool) -> encode (batch_size) -> add,
+        and progress is checkpointed every checkpoint_every chunks, so an interrupted
+        sync resumes where it stopped.
+        Returns: dict with added, changed, removed and skipped filenames
+        """
+        report = {"added": [], "changed": [], "removed": [], "skipped": []}
 
         if not os.path.exists(directory_path):
             print("knowledge_base directory not found.")
-            return
+            return report
 
-        for filename in os.listdir(directory_path):
-            if filename.endswith(".txt"):
-                with open(
-                    os.path.join(directory_path, filename),
-                    "r",
-                    encoding="utf-8",
-                ) as f:
-                    documents.append(f.read())
+        current = {
+            filename: ingest_pipeline.file_digest(os.path.join(directory_path, filename))
+            for filename in sorted(os.listdir(directory_path))
+            if filename.endswith(".txt")
+        }
 
-        if not documents:
+        if not current and not self.manifest["files"]:
             print("No new documents found in knowledge_base.")
-            return
+            return report
 
-        # Split text into chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=600,
-            chunk_overlap=50,
-        )
+        # Legacy index, model switch or forced rebuild: start from scratch
+        if force or not self._is_incremental():
+            self._reset_index()
+
+        known = self.manifest["files"]
+        for filename in known:
+            if filename not in current:
+                report["removed"].append(filename)
+        for filename, digest in current.items():
+            if filename not in known:
+                report["added"].append(filename)
+            elif known[filename]["sha256"] != digest:
+                # Includes files left unfinished by an interrupted sync (empty sha256)
+                report["changed"].append(filename)
+            else:
+                report["skipped"].append(filename)
 
-        all_chunks = []
-        for doc in documents:
-            all_chunks.extend(text_splitter.split_text(doc))
+        if not (report["added"] or report["changed"] or report["removed"]):
+            if not os.path.exists(self.facts_path):
+                self.facts.build(directory_path).save(self.facts_path)
+            print("Knowledge base already up to date.")
+            return report
 
-        print(f"Creating embeddings for {len(all_chunks)} chunks...")
-        embeddings = self.model.encode(all_chunks)
+        self._make_writable()
 
-        # Create FAISS index
-        dimension = embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)
-        self.index.add(np.array(embeddings).astype("float32"))
+        to_embed = report["added"] + report["changed"]
 
-        # Save metadata (text chunks)
-        self.metadata = all_chunks
+        # Drop vectors owned by deleted or modified files
+        stale_ids = []
+        for filename in report["removed"] + report["changed"]:
+            stale_ids.extend(known.pop(filename)["ids"])
+        if stale_ids and not index_factory.supports_remove(self.index):
+            # e.g. HNSW: rebuild from every current file instead of deleting
+            print(f"{self.index_type} index cannot delete vectors; rebuilding it.")
+            self._reset_index()
+            to_embed = list(current)
+            # Unchanged files are re-embedded too, so report them as changed
+            report["changed"].extend(report["skipped"])
+            report["skipped"] = []
+        elif stale_ids:
+            self.index.remove_ids(np.array(stale_ids, dtype="int64"))
+            for vector_id in stale_ids:
+                self.metadata.pop(vector_id, None)
+
+        self._stream_embed(directory_path, to_embed, workers, batch_size, checkpoint_every)
+
+        # Lexical postings and fact tables are cheap to rebuild from text
+        self._rebuild_bm25()
+        self.facts.build(directory_path)
         self.save_index()
 
         print("Knowledge base updated successfully!")
+        return report
+
+    def _stream_embed(self, directory_path, filenames, workers, batch_size, checkpoint_every):
+        """Chunks, encodes and indexes the files batch by batch. Returns: number of chunks added"""
+        known = self.manifest["files"]
+        unfinished = {}  # filename -> [sha256, chunks not yet in the index]
+        batch = []
+        # Trainable index types collect a training sample before the first add
+        untrained = []
+        counts = {"added": 0, "since_checkpoint": 0}
+
+        def add(records, embeddings):
+            self.index.add_with_ids(
+                embeddings, np.array([r["chunk_id"] for r in records], dtype="int64")
+            )
+            self.metadata.update((r["chunk_id"], r) for r in records)
+            for record in records:
+                entry = unfinished[record["source"]]
+                entry[1] -= 1
+                if entry[1] == 0:
+                    # Only a fully indexed file gets its hash; anything else is redone on resume
+                    known[record["source"]]["sha256"] = entry[0]
+                    del unfinished[record["source"]]
+            counts["added"] += len(records)
+            counts["since_checkpoint"] += len(records)
+            if checkpoint_every and counts["since_checkpoint"] >= checkpoint_every:
+                self._checkpoint()
+                counts["since_checkpoint"] = 0
+
+        def build(embeddings):
+            self.index, description, built_type = index_factory.build_index(
+                self.index_type, embeddings, embeddings.shape[1], self.index_params
+            )
+            self.manifest["index_description"] = description
+            # A flat stand-in for an untrainable IVF index is recorded as flat, so the
+            # next sync rebuilds (and retrains) instead of growing the stand-in
+            self.manifest["index_type"] = built_type
+
+        def flush(records, final=False):
+            embeddings = np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype="float32")
+            if records:
+                embeddings = np.array(
+                    self.model.encode([r["text"] for r in records], batch_size=batch_size)
+                ).astype("float32")
+            if self.index is None and self.index_type in index_factory.TRAINABLE_TYPES:
+                untrained.append((records, embeddings))
+                if not final and sum(len(r) for r, _ in untrained) < index_factory.TRAINING_SAMPLE:
+                    return
+                build(np.vstack([e for _, e in untrained]))
+                for pending_records, pending_embeddings in untrained:
+                    if pending_records:
+                        add(pending_records, pending_embeddings)
+                untrained.clear()
+                return
+            if self.index is None:
+                build(embeddings)
+            if records:
+                add(records, embeddings)
+
+        paths = [os.path.join(directory_path, filename) for filename in filenames]
+        progress = tqdm(total=len(paths), desc="Embedding", unit="file", disable=not paths)
+        for path, digest, chunks in ingest_pipeline.iter_chunked(paths, workers):
+            filename = os.path.basename(path)
+            start = self.manifest["next_id"]
+            ids = list(range(start, start + len(chunks)))
+            self.manifest["next_id"] = start + len(chunks)
+            known[filename] = {"sha256": digest if not chunks else "", "ids": ids}
+            if chunks:
+                unfinished[filename] = [digest, len(chunks)]
+            for vector_id, (text, offset) in zip(ids, chunks):
+                batch.append({"chunk_id": vector_id, "text": text, "source": filename, "offset": offset})
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            progress.update(1)
+            progress.set_postfix(chunks=counts["added"] + len(batch))
+        flush(batch, final=True)
+        progress.close()
+        return counts["added"]
+
+    def _checkpoint(self):
+        """
+        Persists the index, chunk text and manifest mid-sync (BM25 and facts follow at the end).
+        Every file is written to a temp file and swapped in: workers that have the
+        index memory-mapped keep reading the old inode until they reload.
+        """
+        tmp_path = self.db_path + ".tmp"
+        faiss.write_index(self.index, tmp_path)
+        os.replace(tmp_path, self.db_path)
+        ChunkStore.write(self.metadata.items(), self.chunks_path, self.chunk_offsets_path)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
 
     def save_index(self):
-        faiss.write_index(self.index, self.db_path)
-        with open(self.metadata_path, "wb") as f:
-            pickle.dump(self.metadata, f)
+        self._checkpoint()
+        self.bm25.save(self.bm25_path)
+        self.facts.save(self.facts_path)
+        self._update_version()
 
     def load_index(self):
-        self.index = faiss.read_index(self.db_path)
+        if self.use_mmap:
+            self.index = faiss.read_index(self.db_path, MMAP_FLAGS)
+        else:
+            self.index = faiss.read_index(self.db_path)
+        self.mmapped = self.use_mmap
+        index_factory.apply_search_params(self.index, self.index_params)
+
+        if self._has_chunk_store():
+            store = ChunkStore(self.chunks_path, self.chunk_offsets_path)
+            self.metadata = store if self.use_mmap else dict(store.items())
+        else:
+            self.metadata = self._load_legacy_metadata()
+
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+        if os.path.exists(self.bm25_path):
+            self.bm25 = BM25Index.load(self.bm25_path)
+        else:
+            self._rebuild_bm25()
+        self._update_version()
+
+    def _load_legacy_metadata(self):
+        """Reads the pickled metadata written before the flat chunk store existed."""
         with open(self.metadata_path, "rb") as f:
-            self.metadata = pickle.load(f)
+            metadata = pickle.load(f)
+        # Older builds stored a plain list of chunk strings where position == vector id
+        if isinstance(metadata, list):
+            metadata = dict(enumerate(metadata))
+        return {
+            vector_id: (
+                record
+                if isinstance(record, dict)
+                else {"chunk_id": vector_id, "text": record, "source": None, "offset": None}
+            )
+            for vector_id, record in metadata.items()
+        }
+
+    def route_shards(self, query):
+        """Returns: shard names for the query, or None to search every shard."""
+        if not self.shards:
+            return None
+        if self.shard_router is None:
+            self.shard_router = shard_router.ShardRouter(self.shards)
+        return self.shard_router.route(query)
+
+    def shard_files(self, name):
+        return shard_router.match_files(self.shards[name], self.manifest.get("files", {}))
+
+    def _shard_filter(self, names):
+        """
+        Vector ids, BM25 mask and FAISS search parameters for a union of shards,
+        cached until the next sync changes the version.
+        Returns: (ids, mask, params), or None when the shards cannot be resolved
+        """
+        if self._shard_filters_version != self.version:
+            self._shard_filters = {}
+            self._shard_filters_version = self.version
+        key = tuple(sorted(names))
+        if key in self._shard_filters:
+            return self._shard_filters[key]
+        if any(name not in self.shards for name in names) or not self.manifest.get("files"):
+            return None  # unknown shard or a legacy index without per-file ids
+
+        files = self.manifest["files"]
+        filenames = {f for name in names for f in self.shard_files(name)}
+        ids = np.array(sorted(i for f in filenames for i in files[f]["ids"]), dtype="int64")
+        mask = np.isin(self.bm25.doc_ids, ids)
+        params = index_factory.selector_params(self.index, ids, exhaustive=False)
+        self._shard_filters[key] = (ids, mask, params)
+        return self._shard_filters[key]
+
+    def shard_stats(self):
+        stats = self.shard_router.stats() if self.shard_router is not None else {}
+        stats["fallbacks"] = self.shard_fallbacks
+        return stats
 
-    def search(self, query, top_k=5):
-        """Searches the index for the most relevant chunks."""
+    def warm(self):
+        """Pulls the mmapped vectors and chunk text into the page cache (run before forking workers)."""
         if self.index is None:
-            return ""
+            return
+        if isinstance(self.metadata, ChunkStore):
+            self.metadata.warm()
+        if self.index.ntotal:
+            # One exhaustive scan touches every vector page
+            self.index.search(np.zeros((1, self.index.d), dtype="float32"), 1)
+
+    def encode_query(self, query):
+        """Returns the float32 embedding of a query, served from cache when possible."""
+        vector = self.query_cache.get(query)
+        if vector is None:
+            vector = self.query_cache.put(query, self.model.encode([query])[0])
+        return vector
 
-        query_vector = self.model.encode([query])
-        _, indices = self.index.search(
-            np.array(query_vector).astype("float32"), top_k
+    def encode_queries(self, queries):
+        """Embeds many queries in one forward pass; cached queries are not re-encoded."""
+        vectors = [self.query_cache.get(q) for q in queries]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            encoded = self.model.encode([queries[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                vectors[i] = self.query_cache.put(queries[i], vector)
+        return np.stack(vectors).astype("float32")
+
+    def _make_hit(self, vector_id, distance):
+        record = self.metadata[vector_id]
+        return SearchHit(
+            chunk_id=int(vector_id),
+            text=record["text"],
+            distance=float(distance),
+            source=record["source"],
+            offset=record["offset"],
         )
 
-        results = [
-            self.metadata[i]
-            for i in indices[0]
-            if i < len(self.metadata)
-        ]
-        return "\n\n".join(results)
+    def _dense_distances(self, query_vector, vector_ids):
+        """
+        FAISS distances for specific vectors, restricted with an ID selector.
+        Exact for flat/IVF types; HNSW may not reach every id (those stay missing).
+        """
+        params = index_factory.selector_params(self.index, vector_ids)
+        try:
+            distances, indices = self.index.search(
+                query_vector.reshape(1, -1), len(vector_ids), params=params
+            )
+        except RuntimeError:
+            return {}
+        return {int(i): float(d) for d, i in zip(distances[0], indices[0]) if i != -1}
+
+    def _fuse(self, hits, lexical, query_vector):
+        """Merges BM25 results into the dense hits and sets a weighted, normalized fused score."""
+        lexical_only = [i for i, _ in lexical if i not in hits and i in self.metadata]
+        distances = self._dense_distances(query_vector, lexical_only) if lexical_only else {}
+        for vector_id in lexical_only:
+            hits[vector_id] = self._make_hit(vector_id, distances.get(vector_id, float("inf")))
+        for vector_id, bm25_score in lexical:
+            if vector_id in hits:
+                hits[vector_id].bm25 = bm25_score
+
+        dense = {i: 1.0 / (1.0 + h.distance) for i, h in hits.items()}
+        low, high = min(dense.values()), max(dense.values())
+        top_bm25 = max((h.bm25 for h in hits.values()), default=0.0) or 1.0
+        for vector_id, hit in hits.items():
+            dense_norm = (dense[vector_id] - low) / (high - low) if high > low else 1.0
+            hit.fused = self.hybrid_alpha * dense_norm + (1.0 - self.hybrid_alpha) * hit.bm25 / top_bm25
+
+    def search_batch(self, queries, top_k=5, max_distance=None, max_tokens=None, hybrid=None, shards=None):
+        """
+        Searches the index for many queries with one encode and one FAISS call.
+        In hybrid mode BM25 candidates are fused with the dense ones.
+        shards: optional shard names; only chunks of those shards are scored
+        Returns: list (one per query) of SearchHit lists, best first
+        """
+        if self.index is None or not queries:
+            return [[] for _ in queries]
+
+        hybrid = self.hybrid if hybrid is None else hybrid
+        candidate_k = top_k * 2 if hybrid else top_k
+
+        mask = params = None
+        shard_filter = self._shard_filter(shards) if shards else None
+        if shard_filter is not None:
+            ids, mask, params = shard_filter
+            if not len(ids):
+                return [[] for _ in queries]
+
+        query_vectors = self.encode_queries(list(queries))
+        distances, indices = self.index.search(query_vectors, candidate_k, params=params)
+
+        results = []
+        for query, query_vector, row_distances, row_indices in zip(
+            queries, query_vectors, distances, indices
+        ):
+            hits = {}
+            for d, i in zip(row_distances, row_indices):
+                if i in self.metadata:
+                    hits[int(i)] = self._make_hit(i, d)
+
+            if hybrid and hits:
+                self._fuse(hits, self.bm25.search(query, candidate_k, mask), query_vector)
+            ranked = sorted(hits.values(), key=lambda h: h.score, reverse=True)[:top_k]
+            results.append(self._apply_cutoffs(ranked, query, max_distance, max_tokens))
+        return results
+
+    def _apply_cutoffs(self, hits, query, max_distance=None, max_tokens=None):
+        """Drops hits beyond the distance threshold and stops once the token budget is spent."""
+        if max_distance is not None:
+            # Strong lexical matches (most of the query's rare terms: a name, a course
+            # code) survive a poor dense distance; sharing one common word does not
+            hits = [
+                hit for hit in hits
+                if hit.distance <= max_distance
+                or (hit.bm25 > 0 and self.bm25.coverage(query, hit.text) >= LEXICAL_COVERAGE)
+            ]
+        if max_tokens is None:
+            return hits
+
+        kept = []
+        used = 0
+        for hit in hits:
+            tokens = estimate_tokens(hit.text)
+            # Always keep the best hit, even if it alone exceeds the budget
+            if kept and used + tokens > max_tokens:
+                break
+            kept.append(hit)
+            used += tokens
+        return kept
+
+    def search(self, query, top_k=5, max_distance=None, max_tokens=None, shards=None):
+        """
+        Searches the index for the most relevant chunks.
+        shards: None searches everything; a list of shard names, or "auto" to
+        route the query, restricts the search. A restricted search that finds
+        nothing (within max_distance) falls back to searching every shard.
+        Returns: list of SearchHit, best first
+        """
+        if self.index is None:
+            return []
 
+        if shards == "auto":
+            shards = self.route_shards(query)
+        hits = self.search_batch([query], top_k, max_distance, max_tokens, shards=shards)[0]
+        if shards and not hits:
+            self.shard_fallbacks += 1
+            hits = self.search_batch([query], top_k, max_distance, max_tokens)[0]
+        return hits
 
 if __name__ == "__main__":
     engine = KnowledgeBaseEngine()
@@ -0,0 +1,305 @@
+"""
+LLM Client
+Pooled, resilient client for OpenAI-compatible chat completion APIs (Groq by
+default). Keeps connections alive, applies connect/read timeouts, retries
+429/5xx with jittered exponential backoff honouring Retry-After, and records
+per-call latency plus time-to-first-token for streamed completions. The base
+URL is configurable so a local stub server can stand in for Groq.
+
+LLMClient is the blocking (requests) client used by Flask/Streamlit;
+AsyncLLMClient is the httpx-based equivalent for the ASGI server.
+"""
+
+import os
+import json
+import time
+import asyncio
+import random
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+DEFAULT_BASE_URL = "https://api.groq.com/openai/v1"
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when the API returns a non-retryable error or retries are exhausted."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _LLMClientBase:
+    """Configuration, retry policy and metrics shared by the sync and async clients."""
+
+    def __init__(
+        self,
+        api_key,
+        base_url=None,
+        model="llama-3.1-8b-instant",
+        connect_timeout=5.0,
+        read_timeout=60.0,
+        max_retries=3,
+        backoff_base=0.5,
+        backoff_max=8.0,
+    ):
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv("GROQ_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.model = model
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+        self.calls = 0
+        self.retries = 0
+        self.errors = 0
+        self.status_codes = {}
+        self.latencies = deque(maxlen=1000)
+        self.first_token_latencies = deque(maxlen=1000)
+        self._lock = threading.Lock()
+
+    @property
+    def chat_url(self):
+        return f"{self.base_url}/chat/completions"
+
+    def _payload(self, messages, temperature, max_tokens, stream=False):
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    @staticmethod
+    def _parse_event(line):
+        """
+        Parses one server-sent-events line of a streamed completion.
+        Returns: content delta, "" for frames without content, or None at [DONE]
+        """
+        if not line or not line.startswith("data:"):
+            return ""
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return None
+        choices = json.loads(data).get("choices") or []
+        return (choices[0].get("delta", {}).get("content") if choices else None) or ""
+
+    def _record_first_token(self, start):
+        with self._lock:
+            self.first_token_latencies.append(time.perf_counter() - start)
+
+    def _record(self, status_code=None, latency=None, retried=False, failed=False):
+        with self._lock:
+            if status_code is not None:
+                self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+            if latency is not None:
+                self.latencies.append(latency)
+            if retried:
+                self.retries += 1
+            if failed:
+                self.errors += 1
+
+    def _retry_delay(self, attempt, response=None):
+        """Seconds to wait before the next attempt: Retry-After if given, else full-jitter backoff."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                try:
+                    wait = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(max(wait, 0.0), self.backoff_max)
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            first_token_latencies = sorted(self.first_token_latencies)
+            status_codes = dict(self.status_codes)
+
+        def percentile(p, values=latencies):
+            if not values:
+                return 0.0
+            return round(values[min(len(values) - 1, int(p * len(values)))], 4)
+
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "errors": self.errors,
+            "status_codes": status_codes,
+            "latency_p50": percentile(0.50),
+            "latency_p95": percentile(0.95),
+            "ttft_p50": percentile(0.50, first_token_latencies),
+            "ttft_p95": percentile(0.95, first_token_latencies),
+        }
+
+
+class LLMClient(_LLMClientBase):
+    def __init__(self, api_key, pool_size=10, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.timeout = (self.connect_timeout, self.read_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(self.headers)
+
+    def _post(self, payload, stream=False):
+        """POSTs to the chat completions endpoint with retries. Returns: requests.Response (status 200)"""
+        with self._lock:
+            self.calls += 1
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            start = time.perf_counter()
+            try:
+                response = self.session.post(
+                    self.chat_url, json=payload, timeout=self.timeout, stream=stream
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(latency=time.perf_counter() - start, retried=not last_attempt, failed=last_attempt)
+                if last_attempt:
+                    raise LLMError(f"Connection failed: {e}") from e
+                time.sleep(self._retry_delay(attempt))
+                continue
+
+            self._record(status_code=response.status_code, latency=time.perf_counter() - start)
+            if response.status_code == 200:
+                return response
+
+            if response.status_code in RETRYABLE_STATUSES and not last_attempt:
+                self._record(retried=True)
+                delay = self._retry_delay(attempt, response)
+                response.close()
+                time.sleep(delay)
+                continue
+
+            self._record(failed=True)
+            raise LLMError(
+                f"{response.status_code} - {response.text[:200]}",
+                status_code=response.status_code,
+            )
+
+    def chat(self, messages, temperature=0.4, max_tokens=1024):
+        """Returns: the assistant message content of a non-streaming completion."""
+        result = self._post(self._payload(messages, temperature, max_tokens)).json()
+        return result["choices"][0]["message"]["content"]
+
+    def stream_chat(self, messages, temperature=0.4, max_tokens=1024):
+        """Yields content deltas of a streamed (stream=True, server-sent events) completion."""
+        start = time.perf_counter()
+        response = self._post(self._payload(messages, temperature, max_tokens, stream=True), stream=True)
+        response.encoding = "utf-8"
+        first_token = True
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                delta = self._parse_event(line)
+                if delta is None:
+                    break
+                if not delta:
+                    continue
+                if first_token:
+                    first_token = False
+                    self._record_first_token(start)
+                yield delta
+        except requests.RequestException as e:
+            self._record(failed=True)
+            raise LLMError(f"Stream interrupted: {e}") from e
+        finally:
+            response.close()
+
+
+class AsyncLLMClient(_LLMClientBase):
+    """httpx-based client: one pooled AsyncClient shared by every in-flight request."""
+
+    def __init__(self, api_key, pool_size=200, **kwargs):
+        if httpx is None:
+            raise ImportError("AsyncLLMClient requires httpx (pip install httpx).")
+        super().__init__(api_key, **kwargs)
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def _send(self, payload, stream=False):
+        """POSTs with the same retry policy as LLMClient. Returns: httpx.Response (status 200)"""
+        with self._lock:
+            self.calls += 1
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            start = time.perf_counter()
+            try:
+                request = self.client.build_request("POST", self.chat_url, json=payload)
+                response = await self.client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                self._record(latency=time.perf_counter() - start, retried=not last_attempt, failed=last_attempt)
+                if last_attempt:
+                    raise LLMError(f"Connection failed: {e}") from e
+                await asyncio.sleep(self._retry_delay(attempt))
+                continue
+
+            self._record(status_code=response.status_code, latency=time.perf_counter() - start)
+            if response.status_code == 200:
+                return response
+
+            body = (await response.aread()).decode("utf-8", "replace")
+            await response.aclose()
+            if response.status_code in RETRYABLE_STATUSES and not last_attempt:
+                self._record(retried=True)
+                await asyncio.sleep(self._retry_delay(attempt, response))
+                continue
+
+            self._record(failed=True)
+            raise LLMError(f"{response.status_code} - {body[:200]}", status_code=response.status_code)
+
+    async def chat(self, messages, temperature=0.4, max_tokens=1024):
+        response = await self._send(self._payload(messages, temperature, max_tokens))
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def stream_chat(self, messages, temperature=0.4, max_tokens=1024):
+        start = time.perf_counter()
+        response = await self._send(self._payload(messages, temperature, max_tokens, stream=True), stream=True)
+        first_token = True
+        try:
+            async for line in response.aiter_lines():
+                delta = self._parse_event(line)
+                if delta is None:
+                    break
+                if not delta:
+                    continue
+                if first_token:
+                    first_token = False
+                    self._record_first_token(start)
+                yield delta
+        except httpx.HTTPError as e:
+            self._record(failed=True)
+            raise LLMError(f"Stream interrupted: {e}") from e
+        finally:
+            await response.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -0,0 +1,215 @@
+"""
+Metrics
+In-process counters, latency histograms and per-request stage timing for the
+chat pipeline, rendered in the Prometheus text format for the /metrics route.
+
+    trace = metrics.RequestTrace("get_response")
+    with trace.stage("search"):
+        hits = kb.search(...)
+    trace.finish("llm")   # records every stage + the total, logs slow requests
+
+Values are per process: with several gunicorn workers each one reports its
+own numbers (scrape each worker, or sum them in Prometheus).
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Seconds; covers sub-millisecond local answers up to slow LLM completions
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Prompt / context sizes in tokens
+SIZE_BUCKETS = (100, 250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._meta = {}        # name -> (type, help)
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._buckets = {}     # name -> bucket bounds
+        self._collectors = {}  # name -> callable yielding (name, type, help, [(labels dict, value)])
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text):
+        self._meta[name] = ("counter", help_text)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self._meta[name] = ("histogram", help_text)
+        self._buckets[name] = tuple(buckets)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        bounds = self._buckets[name]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            state = self._histograms.get(key)
+            if state is None:
+                state = self._histograms[key] = [0] * len(bounds) + [0.0, 0]
+            for i, bound in enumerate(bounds):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def register_collector(self, name, collector):
+        """
+        Adds a callable polled at render time, for stats kept elsewhere (caches,
+        LLM client). Registering the same name again replaces the collector.
+        """
+        self._collectors[name] = collector
+
+    def render(self):
+        """Returns: every metric in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(state) for key, state in self._histograms.items()}
+
+        lines = []
+        for name, (kind, help_text) in sorted(self._meta.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                continue
+            bounds = self._buckets[name]
+            for (metric, labels), state in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(bounds + (float("inf"),), state[:len(bounds)] + [state[-1]]):
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(round(state[-2], 6))}")
+                lines.append(f"{name}_count{_labels(labels)} {state[-1]}")
+
+        for collector in list(self._collectors.values()):
+            for name, kind, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(sorted(labels.items()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+registry.histogram("neura_request_seconds", "End-to-end chat request latency.")
+registry.histogram("neura_stage_seconds", "Time spent in each chat pipeline stage.")
+registry.histogram("neura_prompt_tokens", "Estimated tokens in prompts sent to the LLM.", SIZE_BUCKETS)
+registry.counter("neura_requests_total", "Chat requests by route and how they were answered.")
+registry.counter("neura_prompt_chars_total", "Characters sent to the LLM in prompts.")
+registry.counter("neura_prompt_tokens_total", "Estimated tokens sent to the LLM in prompts.")
+registry.counter("neura_context_chunks_total", "Retrieved chunks, before (retrieved) and after (used) assembly.")
+registry.counter("neura_context_tokens_saved_total", "Context tokens removed by merging, de-duplication and the token budget.")
+registry.counter("neura_llm_errors_total", "Failed LLM calls by HTTP status (none = connection/stream error).")
+registry.counter("neura_errors_total", "Unexpected errors by pipeline stage and exception type.")
+registry.counter("neura_slow_requests_total", "Requests slower than SLOW_REQUEST_MS.")
+
+
+class RequestTrace:
+    """Stage timings for one chat request."""
+
+    # Requests slower than this (ms) are printed with their stage breakdown; 0 disables
+    slow_ms = float(os.getenv("SLOW_REQUEST_MS", "0"))
+
+    def __init__(self, route, metrics=None):
+        self.route = route
+        self.metrics = metrics or registry
+        self.stages = {}
+        self.stage_name = None
+        # Set by the pipeline when it answers without the LLM (local, cache)
+        self.outcome = None
+        self.started = time.perf_counter()
+        self.finished = False
+
+    @contextmanager
+    def stage(self, name):
+        self.stage_name = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+        # Only reached without an exception, so error() still sees the failing stage
+        self.stage_name = None
+
+    def error(self, exc):
+        """Counts an unexpected exception against the stage it escaped from."""
+        self.metrics.inc("neura_errors_total", stage=self.stage_name or "unknown", type=type(exc).__name__)
+        print(f"[{self.route}] {type(exc).__name__} in stage '{self.stage_name}': {exc}")
+
+    def finish(self, outcome=None):
+        """Records the stage and total timings once; outcome is e.g. local, cache, llm or error."""
+        if self.finished:
+            return
+        self.finished = True
+        outcome = outcome or self.outcome or "llm"
+        total = time.perf_counter() - self.started
+        for name, seconds in self.stages.items():
+            self.metrics.observe("neura_stage_seconds", seconds, stage=name)
+        self.metrics.observe("neura_request_seconds", total, route=self.route)
+        self.metrics.inc("neura_requests_total", route=self.route, outcome=outcome)
+
+        if self.slow_ms and total * 1000 >= self.slow_ms:
+            self.metrics.inc("neura_slow_requests_total", route=self.route)
+            breakdown = {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+            print(f"SLOW {self.route} {total * 1000:.0f}ms outcome={outcome} stages_ms={json.dumps(breakdown)}")
+
+
+def record_llm_error(error):
+    """Counts an LLMError by its HTTP status ("none" for connection / stream failures)."""
+    registry.inc("neura_llm_errors_total", status=getattr(error, "status_code", None) or "none")
+
+
+def llm_client_metrics(client, prefix="neura_llm"):
+    """Collector samples for an LLMClient / AsyncLLMClient."""
+    stats = client.stats()
+    return [
+        (f"{prefix}_calls_total", "counter", "LLM API calls (retries excluded).", [({}, stats["calls"])]),
+        (f"{prefix}_retries_total", "counter", "LLM API retries.", [({}, stats["retries"])]),
+        (f"{prefix}_responses_total", "counter", "LLM API responses by HTTP status code.",
+         [({"code": code}, count) for code, count in sorted(stats["status_codes"].items())]),
+    ]
+
+
+def cache_metrics(name, stats):
+    """Collector samples for a cache exposing hits/misses in stats()."""
+    return [
+        (f"neura_{name}_hits_total", "counter", f"{name} hits.", [({}, stats["hits"])]),
+        (f"neura_{name}_misses_total", "counter", f"{name} misses.", [({}, stats["misses"])]),
+    ]
+
+
+def singleflight_metrics(stats, mode):
+    """Collector samples for a SingleFlight / AsyncSingleFlight; mode labels which one."""
+    labels = {"mode": mode}
+    return [
+        ("neura_singleflight_leaders_total", "counter", "Requests that computed an answer for their question.",
+         [(labels, stats["leaders"])]),
+        ("neura_singleflight_coalesced_total", "counter",
+         "Requests that shared the answer of an identical in-flight question.", [(labels, stats["coalesced"])]),
+        ("neura_singleflight_in_flight", "gauge", "Distinct questions currently being answered.",
+         [(labels, stats["in_flight"])]),
+    ]
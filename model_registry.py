@@ -0,0 +1,138 @@
+"""
+Shared Model Registry
+Loads the sentence encoder and the knowledge-base index once per process and
+hands the same read-only instances to every ChatBot / Streamlit session, so
+concurrent visitors no longer each pay model load time and ~100+ MB of RAM.
+Other per-process state that must be shared across sessions (answer cache,
+in-flight question coalescing) is kept here too.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+
+from sentence_transformers import SentenceTransformer
+
+
+def _encoder_bytes(model):
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except Exception:
+        return 0
+
+
+def _engine_bytes(engine):
+    """Approximate RAM a private engine would cost: encoder weights + vectors + chunk text."""
+    index_bytes = engine.index.ntotal * engine.index.d * 4 if engine.index is not None else 0
+    text_bytes = getattr(engine.metadata, "nbytes", None)
+    if text_bytes is None:
+        text_bytes = sum(len(record["text"]) for record in engine.metadata.values())
+    return _encoder_bytes(engine.model) + index_bytes + text_bytes
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._encoders = {}
+        self._engines = {}
+        self._shared = {}
+        self._lock = threading.RLock()
+        self.load_seconds = {}
+        self.handouts = {}
+        self.resource_bytes = {}
+        self.cold_latency = None
+        self.warm_latencies = deque(maxlen=1000)
+
+    def _handout(self, key):
+        self.handouts[key] = self.handouts.get(key, 0) + 1
+
+    def get_encoder(self, model_name):
+        """Returns the process-wide SentenceTransformer for model_name, loading it on first use."""
+        key = f"encoder:{model_name}"
+        with self._lock:
+            if model_name not in self._encoders:
+                start = time.perf_counter()
+                # Force CPU (required for Streamlit Cloud)
+                model = SentenceTransformer(model_name, device="cpu")
+                self.load_seconds[key] = time.perf_counter() - start
+                self.resource_bytes[key] = _encoder_bytes(model)
+                self._encoders[model_name] = model
+            self._handout(key)
+            return self._encoders[model_name]
+
+    def get_engine(self, directory_path="knowledge_base", **engine_kwargs):
+        """
+        Returns the shared KnowledgeBaseEngine for these settings. The first call
+        loads (or ingests) the index; later calls return the same instance.
+        """
+        from knowledge_base_engine import KnowledgeBaseEngine
+
+        key = "engine:" + repr(sorted(engine_kwargs.items()))
+        start = time.perf_counter()
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = KnowledgeBaseEngine(**engine_kwargs)
+
+                # Auto-ingest if index is missing but data exists
+                if engine.index is None and os.path.exists(directory_path):
+                    print("No index found. Ingesting knowledge_base for the first time...")
+                    engine.ingest_directory(directory_path)
+
+                # Fact tables ship with newer syncs; parse them directly for older indexes
+                if not engine.facts.faculty and os.path.exists(directory_path):
+                    engine.facts.build(directory_path)
+
+                self._engines[key] = engine
+                self.load_seconds[key] = time.perf_counter() - start
+                self.resource_bytes[key] = _engine_bytes(engine)
+                self.cold_latency = self.load_seconds[key]
+            else:
+                self.warm_latencies.append(time.perf_counter() - start)
+            self._handout(key)
+            return engine
+
+    def get_shared(self, name, factory):
+        """
+        Returns the process-wide object registered under name, creating it with
+        factory() on first use (Streamlit builds a ChatBot per browser session).
+        """
+        key = f"shared:{name}"
+        with self._lock:
+            if name not in self._shared:
+                self._shared[name] = factory()
+            self._handout(key)
+            return self._shared[name]
+
+    def warm(self):
+        """Faults every shared engine's mmapped files into the page cache (preload mode)."""
+        with self._lock:
+            for engine in self._engines.values():
+                engine.warm()
+
+    def stats(self):
+        """Load times, handouts and the memory saved by sharing instead of reloading."""
+        with self._lock:
+            saved = sum(
+                self.resource_bytes.get(key, 0) * (count - 1)
+                for key, count in self.handouts.items()
+            )
+            return {
+                "resources": {
+                    key: {
+                        "handouts": self.handouts.get(key, 0),
+                        "load_seconds": round(self.load_seconds.get(key, 0.0), 3),
+                        "bytes": self.resource_bytes.get(key, 0),
+                    }
+                    for key in self.handouts
+                },
+                "memory_saved_bytes": saved,
+                "first_request_load_seconds": round(self.cold_latency or 0.0, 3),
+                "warm_request_seconds": round(
+                    sum(self.warm_latencies) / len(self.warm_latencies), 6
+                ) if self.warm_latencies else None,
+            }
+
+
+# Process-wide instance shared by every ChatBot
+registry = ModelRegistry()
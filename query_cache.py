@@ -0,0 +1,73 @@
+"""
+Query Embedding Cache
+Bounded LRU/TTL cache of query text -> float32 embedding so repeated
+questions skip the transformer forward pass.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class QueryEmbeddingCache:
+    def __init__(self, max_size=1024, ttl_seconds=3600, model_name=None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query):
+        """Lowercases and collapses whitespace so trivial variants share an entry."""
+        return " ".join(query.lower().split())
+
+    def bind_model(self, model_name):
+        """Drops every cached vector when the embedding model changes."""
+        with self._lock:
+            if model_name != self.model_name:
+                self._entries.clear()
+                self.model_name = model_name
+
+    def get(self, query):
+        key = self.normalize(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, stored_at = entry
+                if self.ttl_seconds is None or time.time() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, query, vector):
+        vector = np.array(vector, dtype="float32").reshape(-1)
+        vector.setflags(write=False)
+        key = self.normalize(query)
+        with self._lock:
+            self._entries[key] = (vector, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return vector
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,221 @@
+"""
+Conversation Store
+Per-session chat history with bounded memory. Each session keeps a ring
+buffer of its last messages; idle sessions expire after a TTL and the least
+recently used ones are evicted when the global session/byte caps are hit.
+
+Backends:
+- InMemoryBackend: process-local dict (single worker, Streamlit)
+- SQLiteBackend: shared file, so every gunicorn worker sees the same sessions
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+
+
+def _message_size(message):
+    return len(message["role"]) + len(message["content"])
+
+
+class InMemoryBackend:
+    def __init__(self, max_messages=8, max_sessions=10000, max_bytes=64 * 1024 * 1024, ttl_seconds=1800):
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._sessions = OrderedDict()  # session_id -> (deque of messages, last_seen)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, session_id):
+        messages, _ = self._sessions.pop(session_id)
+        self._bytes -= sum(_message_size(m) for m in messages)
+        self.evictions += 1
+
+    def _expire(self, now):
+        # Sessions are ordered by last use, so expired ones sit at the front
+        while self._sessions:
+            session_id, (_, last_seen) = next(iter(self._sessions.items()))
+            if now - last_seen < self.ttl_seconds:
+                break
+            self._drop(session_id)
+
+    def get(self, session_id):
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            self._sessions[session_id] = (entry[0], now)
+            self._sessions.move_to_end(session_id)
+            return list(entry[0])
+
+    def append(self, session_id, messages):
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            buffer = entry[0] if entry else deque(maxlen=self.max_messages)
+            for message in messages:
+                if len(buffer) == buffer.maxlen:
+                    self._bytes -= _message_size(buffer[0])
+                buffer.append(message)
+                self._bytes += _message_size(message)
+            self._sessions[session_id] = (buffer, now)
+            self._sessions.move_to_end(session_id)
+
+            while len(self._sessions) > 1 and (
+                len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes
+            ):
+                self._drop(next(iter(self._sessions)))
+
+    def clear(self, session_id):
+        with self._lock:
+            if session_id in self._sessions:
+                self._drop(session_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+            }
+
+
+class SQLiteBackend:
+    def __init__(self, path="iqra_sessions.db", max_messages=8, max_sessions=10000, ttl_seconds=1800):
+        self.path = path
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+
+    def _connect(self):
+        # One connection per thread and process, opened on first use. With
+        # gunicorn's preload_app the backend is built in the master, and a
+        # sqlite connection must never be used on both sides of a fork.
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5)
+            self._create_tables(connection)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _create_tables(connection):
+        with connection as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "session_id TEXT, seq INTEGER PRIMARY KEY AUTOINCREMENT, role TEXT, content TEXT)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, seq)")
+            db.execute("CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, last_seen REAL)")
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)")
+
+    def _expire(self, db, now):
+        expired = [row[0] for row in db.execute(
+            "SELECT session_id FROM sessions WHERE last_seen < ?", (now - self.ttl_seconds,)
+        )]
+        overflow = db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - len(expired) - self.max_sessions
+        if overflow > 0:
+            expired += [row[0] for row in db.execute(
+                "SELECT session_id FROM sessions WHERE last_seen >= ? ORDER BY last_seen LIMIT ?",
+                (now - self.ttl_seconds, overflow),
+            )]
+        for session_id in expired:
+            db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def get(self, session_id):
+        db = self._connect()
+        with db:
+            now = time.time()
+            row = db.execute("SELECT last_seen FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None or now - row[0] >= self.ttl_seconds:
+                return []
+            db.execute("UPDATE sessions SET last_seen = ? WHERE session_id = ?", (now, session_id))
+            rows = db.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                (session_id, self.max_messages),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def append(self, session_id, messages):
+        db = self._connect()
+        with db:
+            now = time.time()
+            db.executemany(
+                "INSERT INTO messages (session_id, role, content) VALUES (?, ?, ?)",
+                [(session_id, m["role"], m["content"]) for m in messages],
+            )
+            # Keep only the ring-buffer tail for this session
+            db.execute(
+                "DELETE FROM messages WHERE session_id = ? AND seq NOT IN ("
+                "SELECT seq FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?)",
+                (session_id, session_id, self.max_messages),
+            )
+            db.execute(
+                "INSERT INTO sessions (session_id, last_seen) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET last_seen = excluded.last_seen",
+                (session_id, now),
+            )
+            self._expire(db, now)
+
+    def clear(self, session_id):
+        db = self._connect()
+        with db:
+            db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def stats(self):
+        db = self._connect()
+        return {
+            "backend": "sqlite",
+            "sessions": db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0],
+            "messages": db.execute("SELECT COUNT(*) FROM messages").fetchone()[0],
+        }
+
+
+class ConversationStore:
+    def __init__(self, backend=None):
+        self.backend = backend or InMemoryBackend()
+
+    @classmethod
+    def from_env(cls):
+        """CONVERSATION_BACKEND=memory|sqlite, CONVERSATION_DB, CONVERSATION_TTL, CONVERSATION_MAX_SESSIONS"""
+        ttl = int(os.getenv("CONVERSATION_TTL", "1800"))
+        max_sessions = int(os.getenv("CONVERSATION_MAX_SESSIONS", "10000"))
+        if os.getenv("CONVERSATION_BACKEND", "memory").lower() == "sqlite":
+            backend = SQLiteBackend(
+                path=os.getenv("CONVERSATION_DB", "iqra_sessions.db"),
+                max_sessions=max_sessions,
+                ttl_seconds=ttl,
+            )
+        else:
+            backend = InMemoryBackend(max_sessions=max_sessions, ttl_seconds=ttl)
+        return cls(backend)
+
+    def history(self, session_id):
+        """Returns: the retained messages of the session, oldest first."""
+        return self.backend.get(session_id)
+
+    def append_turn(self, session_id, user_input, bot_response):
+        self.backend.append(session_id, [
+            {"role": "user", "content": user_input},
+            {"role": "assistant", "content": bot_response},
+        ])
+
+    def clear(self, session_id):
+        self.backend.clear(session_id)
+
+    def stats(self):
+        return self.backend.stats()
@@ -0,0 +1,118 @@
+"""
+Shard Router
+Logical domain shards over the knowledge base: each shard is a group of
+source files (filename patterns), and a search restricted to a shard only
+scores that group's chunks (an ID selector over the one FAISS index plus a
+BM25 mask), so fee questions are not crowded out by policy chunks.
+
+ShardRouter reuses AdvancedNLPEngine's intent keywords, plus a few
+domain words, compiled into a single IntentMatcher scan to pick the shards for
+a query. Queries that match no domain are searched across every shard.
+"""
+
+import fnmatch
+import threading
+
+from intent_matcher import IntentMatcher
+
+# Shard name -> filename patterns. A file may sit in several shards: the
+# general policies file also holds faculty schedules, admission criteria and
+# campus details.
+DEFAULT_SHARDS = {
+    "fees": ["*fee*", "*scholarship*"],
+    "faculty": ["*faculty*", "iqra_policies_initial.txt"],
+    "admissions": ["*admission*", "iqra_policies_initial.txt"],
+    "policies": ["*polic*", "*conduct*", "*calendar*", "*grading*"],
+    "campus": ["*campus*", "*transport*", "iqra_policies_initial.txt"],
+}
+
+# AdvancedNLPEngine intents that point at a shard
+SHARD_INTENTS = {
+    "fees": ["fee_inquiry"],
+    "admissions": ["admission_inquiry"],
+    "policies": ["attendance_inquiry", "exam_inquiry"],
+    "campus": ["location_inquiry"],
+}
+
+# Domain words the intent table does not cover
+SHARD_KEYWORDS = {
+    "fees": ["scholarship", "discount", "waiver", "loan", "qarz", "financial aid", "challan", "rupees", "pkr"],
+    "faculty": ["teacher", "faculty", "professor", "lecturer", "dean", "vice chancellor", "consultation",
+                "counseling", "madam", "instructor"],
+    "admissions": ["eligibility", "entry test", "merit", "deadline", "hssc", "intermediate", "provisional"],
+    "policies": ["policy", "rule", "grading", "grade", "gpa", "cgpa", "dress code", "smoking", "freeze",
+                 "withdraw", "credit transfer", "semester", "calendar", "wifi", "wi-fi", "plagiarism"],
+    "campus": ["shuttle", "transport", "library", "society", "societies", "club",
+               "placement", "job fair", "contact", "phone number", "email", "hostel", "cafeteria"],
+}
+
+# Short words that need word boundaries ("bus" is not "business")
+SHARD_PATTERNS = {
+    "faculty": [r"\bsir\b", r"\bhod\b"],
+    "campus": [r"\bbus(es)?\b"],
+}
+
+
+def match_files(patterns, filenames):
+    return [name for name in filenames if any(fnmatch.fnmatch(name, p) for p in patterns)]
+
+
+class ShardRouter:
+    def __init__(self, shards=None, nlp=None, max_shards=2):
+        """
+        shards: names to route between (default DEFAULT_SHARDS)
+        nlp: AdvancedNLPEngine whose intent table supplies the domain keywords
+        max_shards: most shards a query is routed to before searching all of them
+        """
+        if nlp is None:
+            from advanced_nlp_engine import AdvancedNLPEngine
+            nlp = AdvancedNLPEngine()
+        self.shards = list(shards or DEFAULT_SHARDS)
+        self.max_shards = max_shards
+
+        table = {}
+        for shard in self.shards:
+            keywords = list(SHARD_KEYWORDS.get(shard, []))
+            patterns = list(SHARD_PATTERNS.get(shard, []))
+            for intent in SHARD_INTENTS.get(shard, []):
+                data = nlp.intent_patterns.get(intent, {})
+                keywords.extend(data.get("keywords", []))
+                patterns.extend(data.get("patterns", []))
+            table[shard] = {"keywords": keywords, "patterns": patterns}
+        self.matcher = IntentMatcher(table)
+
+        self.routed = 0
+        self.fanned_out = 0
+        self.by_shard = {}
+        self._lock = threading.Lock()
+
+    def route(self, query):
+        """
+        Returns: list of shard names to search, best first, or None to search every shard
+        """
+        scores = self.matcher.scores(query.lower())
+        ranked = sorted(
+            (i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i]
+        )
+        names = [self.matcher.intents[i] for i in ranked]
+        # Too many domains means a broad question: searching everything is cheaper than guessing
+        if not names or len(names) > self.max_shards:
+            names = None
+        with self._lock:
+            if names is None:
+                self.fanned_out += 1
+            else:
+                self.routed += 1
+                for name in names:
+                    self.by_shard[name] = self.by_shard.get(name, 0) + 1
+        return names
+
+    def stats(self):
+        with self._lock:
+            total = self.routed + self.fanned_out
+            return {
+                "routed": self.routed,
+                "fanned_out": self.fanned_out,
+                "routed_fraction": round(self.routed / total, 4) if total else 0.0,
+                "by_shard": dict(self.by_shard),
+            }
@@ -0,0 +1,281 @@
+"""
+Single Flight
+Coalesces identical in-flight questions: the first request for a key (the
+leader) computes the answer, and concurrent duplicates wait for that one
+computation and share its result instead of repeating encode -> search ->
+Groq. Streamed answers are written to a shared buffer, so every waiter
+replays the text from the start and then follows along as it is produced.
+
+Keys combine the normalized question, the knowledge-base version and (for
+sessions with history) a digest of the conversation, so a re-sync or a
+different conversation never shares an answer. A flight only lives while
+it is running; repeats after it lands are the semantic answer cache's job.
+
+SingleFlight serves threaded servers (Flask, Streamlit, CLI) and
+AsyncSingleFlight the ASGI event loop.
+"""
+
+import json
+import asyncio
+import hashlib
+import threading
+
+from query_cache import QueryEmbeddingCache
+
+
+def flight_key(question, kb_version, history=None):
+    """Returns: coalescing key for a question asked against a KB version and conversation."""
+    digest = ""
+    if history:
+        digest = hashlib.sha256(
+            json.dumps(history, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:16]
+    return f"{kb_version}|{digest}|{QueryEmbeddingCache.normalize(question)}"
+
+
+class _Stats:
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+
+    def stats(self):
+        total = self.leaders + self.coalesced
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight(),
+            "coalesced_fraction": round(self.coalesced / total, 4) if total else 0.0,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Threads
+# ---------------------------------------------------------------------------
+
+class _Flight:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.chunks = []
+        self.done = False
+        self.result = None
+        self.error = None
+
+
+class FlightStream:
+    """Iterator over a flight's chunks from the first one; result/text are set once it ends."""
+
+    def __init__(self, flight):
+        self.flight = flight
+
+    def __iter__(self):
+        flight = self.flight
+        position = 0
+        while True:
+            with flight.cond:
+                flight.cond.wait_for(lambda: flight.done or len(flight.chunks) > position)
+                chunks = flight.chunks[position:]
+                done = flight.done
+            for chunk in chunks:
+                yield chunk
+            position += len(chunks)
+            if done:
+                if flight.error is not None:
+                    raise flight.error
+                return
+
+    @property
+    def result(self):
+        return self.flight.result
+
+    @property
+    def text(self):
+        return "".join(self.flight.chunks)
+
+
+class SingleFlight(_Stats):
+    def __init__(self):
+        super().__init__()
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self):
+        return len(self._flights)
+
+    def _join(self, key):
+        """Returns: (flight, True if this caller leads it)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self.leaders += 1
+            return flight, True
+
+    def _land(self, key, flight, result=None, error=None):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        with flight.cond:
+            flight.result = result
+            flight.error = error
+            flight.done = True
+            flight.cond.notify_all()
+
+    def do(self, key, fn):
+        """
+        Runs fn() once per key among concurrent callers; waiters get the
+        leader's result (or its exception).
+        Returns: (result, True if this caller ran fn)
+        """
+        flight, leader = self._join(key)
+        if leader:
+            try:
+                result = fn()
+            except BaseException as e:
+                self._land(key, flight, error=e)
+                raise
+            self._land(key, flight, result=result)
+            return result, True
+
+        with flight.cond:
+            flight.cond.wait_for(lambda: flight.done)
+        if flight.error is not None:
+            raise flight.error
+        return flight.result, False
+
+    def stream(self, key, produce):
+        """
+        Shares one streamed computation per key. produce(emit) runs once, in a
+        background thread so it finishes even if the leader's client goes
+        away; it calls emit(chunk) for each piece and its return value becomes
+        the stream's result.
+        Returns: (FlightStream, True if this caller started produce)
+        """
+        flight, leader = self._join(key)
+        if leader:
+            threading.Thread(
+                target=self._produce, args=(key, flight, produce), daemon=True
+            ).start()
+        return FlightStream(flight), leader
+
+    def _produce(self, key, flight, produce):
+        def emit(chunk):
+            with flight.cond:
+                flight.chunks.append(chunk)
+                flight.cond.notify_all()
+
+        try:
+            result = produce(emit)
+        except BaseException as e:
+            self._land(key, flight, error=e)
+            return
+        self._land(key, flight, result=result)
+
+
+# ---------------------------------------------------------------------------
+# asyncio
+# ---------------------------------------------------------------------------
+
+class _AsyncFlight:
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.result = None
+        self.error = None
+        # Replaced on every change; waiters sleep on the current one
+        self.changed = asyncio.Event()
+        self.task = None
+
+    def notify(self):
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class AsyncFlightStream:
+    def __init__(self, flight):
+        self.flight = flight
+
+    async def __aiter__(self):
+        flight = self.flight
+        position = 0
+        while True:
+            if position < len(flight.chunks):
+                chunks = flight.chunks[position:]
+                position += len(chunks)
+                for chunk in chunks:
+                    yield chunk
+                continue
+            if flight.done:
+                if flight.error is not None:
+                    raise flight.error
+                return
+            await flight.changed.wait()
+
+    @property
+    def result(self):
+        return self.flight.result
+
+    @property
+    def text(self):
+        return "".join(self.flight.chunks)
+
+
+class AsyncSingleFlight(_Stats):
+    """Same as SingleFlight for coroutines; all calls must come from one event loop."""
+
+    def __init__(self):
+        super().__init__()
+        self._tasks = {}
+        self._streams = {}
+
+    def in_flight(self):
+        return len(self._tasks) + len(self._streams)
+
+    async def do(self, key, make_coro):
+        """
+        Awaits make_coro() once per key; the work is a task shielded from
+        the cancellation of any single waiter.
+        Returns: (result, True if this caller started it)
+        """
+        task = self._tasks.get(key)
+        leader = task is None
+        if leader:
+            self.leaders += 1
+            task = asyncio.ensure_future(make_coro())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task), leader
+
+    def stream(self, key, produce):
+        """
+        Async counterpart of SingleFlight.stream: produce(emit) is a coroutine
+        run once as a task; emit(chunk) is a plain function.
+        Returns: (AsyncFlightStream, True if this caller started produce)
+        """
+        flight = self._streams.get(key)
+        leader = flight is None
+        if leader:
+            self.leaders += 1
+            flight = self._streams[key] = _AsyncFlight()
+            flight.task = asyncio.ensure_future(self._produce(key, flight, produce))
+        else:
+            self.coalesced += 1
+        return AsyncFlightStream(flight), leader
+
+    async def _produce(self, key, flight, produce):
+        def emit(chunk):
+            flight.chunks.append(chunk)
+            flight.notify()
+
+        try:
+            flight.result = await produce(emit)
+        except BaseException as e:
+            flight.error = e
+        finally:
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            flight.done = True
+            flight.notify()
@@ -1,6 +1,7 @@
+import uuid
 import streamlit as st
-import time
 from chatbot import ChatBot
+from model_registry import registry
 
 # Page Config
 st.set_page_config(
@@ -38,10 +39,22 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Initialize ChatBot
+def clean_response(text):
+    """Removes internal widget tags and bold markers from a (partial) response."""
+    for tag in ["[WIDGET:FEE]", "[WIDGET:GRADE]", "[WIDGET:MAP]", "[WIDGET:TEAM]", "[WIDGET:AURA]", "**"]:
+        text = text.replace(tag, "")
+    return text.strip()
+
+# Initialize ChatBot (cheap per session: the encoder, index, answer cache and in-flight
+# questions come from the shared registry, so identical questions from different
+# visitors are coalesced and cached together)
 if "bot" not in st.session_state:
     st.session_state.bot = ChatBot()
 
+# Conversation id for this browser session's history
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
 # Initialize Chat History
 if "messages" not in st.session_state:
     st.session_state.messages = [
@@ -70,19 +83,17 @@ if prompt := st.chat_input("Ask about Fees, Attendance, or Faculty..."):
         full_response = ""
         
         try:
-            # Show thinking pulse
+            # Stream tokens from Groq as they arrive
             with st.spinner("Analyzing neural link..."):
-                raw_response = st.session_state.bot.get_response(prompt)
+                stream = st.session_state.bot.stream_response(prompt, st.session_state.session_id)
+                first_chunk = next(stream, "")
                 
-            # Clean response from internal widgets if any
-            clean_res = raw_response.replace("[WIDGET:FEE]", "").replace("[WIDGET:GRADE]", "").replace("[WIDGET:MAP]", "").replace("[WIDGET:TEAM]", "").replace("[WIDGET:AURA]", "").replace("**", "").strip()
-            
-            # Simulate streaming
-            for chunk in clean_res.split():
-                full_response += chunk + " "
-                time.sleep(0.05)
-                message_placeholder.markdown(full_response + "▌")
+            full_response = first_chunk
+            for chunk in stream:
+                full_response += chunk
+                message_placeholder.markdown(clean_response(full_response) + "▌")
             
+            full_response = clean_response(full_response)
             message_placeholder.markdown(full_response)
         except Exception as e:
             st.error(f"Neural Link Failure: {str(e)}")
@@ -100,6 +111,10 @@ with st.sidebar:
     st.write("**Developed by:**")
     st.success("Sajjad Baloch & Team")
     st.markdown("---")
+    with st.expander("Engine Stats"):
+        # Encoder/index are shared by all sessions in this process
+        st.json(registry.stats())
     if st.button("Clear Chat History"):
         st.session_state.messages = []
+        st.session_state.bot.conversations.clear(st.session_state.session_id)
         st.rerun()
@@ -1,8 +1,9 @@
 from knowledge_base_engine import KnowledgeBaseEngine
 import os
 import time
+import argparse
 
-def sync():
+def sync(force=False):
     print("🧠 IQRA VIRTUAL BRAIN - SYNCHRONIZER")
     print("------------------------------------")
     
@@ -15,7 +16,15 @@ def sync():
     engine = KnowledgeBaseEngine()
     
     print("Scanning knowledge_base folder for new data...")
-    engine.ingest_directory('knowledge_base')
+    report = engine.ingest_directory('knowledge_base', force=force)
+    
+    print(f"Added: {len(report['added'])} | Changed: {len(report['changed'])} | Removed: {len(report['removed'])}")
+    for filename in report['added'] + report['changed']:
+        print(f"  ~ re-embedded {filename}")
+    for filename in report['removed']:
+        print(f"  - removed {filename}")
+    if report['skipped']:
+        print(f"Skipped {len(report['skipped'])} unchanged file(s): {', '.join(report['skipped'])}")
     
     end_time = time.time()
     print(f"------------------------------------")
@@ -23,4 +32,6 @@ def sync():
     print(f"Chatbot is now updated with the latest university information.")
 
 if __name__ == "__main__":
-    sync()
+    parser = argparse.ArgumentParser(description="Sync the knowledge_base folder into the search index.")
+    parser.add_argument("--force", action="store_true", help="rebuild the whole index instead of updating it")
+    sync(force=parser.parse_args().force)